@@ -1,53 +1,58 @@
 import os
-from openai import OpenAI
+import sys
+import asyncio
+import textwrap
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from semantic_cache import SemanticCache
+from batch_runner import run_batch
+from structured_outputs import strict_response_format
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# repeated / near-identical prompts are answered from here instead of the API,
+# across runs too since each run only handles a single topic
+cache = SemanticCache(client, os.getenv("SEMANTIC_CACHE", "/tmp/semantic_cache.sqlite3"), threshold=0.95)
 
-def generate_draft(topic: str, model: str = "gpt-5-mini") -> str:
-    """
-    uses a language model to generate a complete draft essay
-    """
+# set by main when a single topic is processed, so its streamed draft is printed as it arrives;
+# with several topics streaming at once the chunks would interleave
+ECHO_STREAM = False
+# whether complete() has echoed a completion (cache hits don't stream)
+_echoed = False
 
-    ### START OMIT BLOCK
-    prompt = f"""
+
+class EssayRevision(BaseModel):
+    critique: str = Field(description="Constructive feedback on the draft, with areas of improvement and suggestions.")
+    revised: str = Field(description="The final essay, revised based on the critique.")
+
+
+# dedented so the source indentation doesn't get sent (and billed) as prompt tokens
+DRAFT_PROMPT = textwrap.dedent("""\
     Write a well-structured draft essay in response to the following topic.
     The draft should include an introduction, body, and conclusion.
 
     topic:
-    {topic}
-    """
+    {topic}""")
 
-    # Get a response from the LLM by creating a chat with the client.
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-    )
+REVISION_PROMPT = textwrap.dedent("""\
+    Critique the essay draft: point out areas of improvement with suggestions.
+    Then revise it based on that critique for clarity and coherence, and provide the final essay.
 
-    return response.choices[0].message.content
+    Draft:
+    {draft}""")
 
 
-def reflect_on_draft(draft: str, model: str = "gpt-5-mini") -> str:
+async def complete(prompt: str, model: str) -> str:
     """
-    uses a language model to provide constructive feedback on the essay draft
-    """
-    prompt = f"""
-    Analyze the essay draft and provide a constructive feedback.
-    Point out the areas of improvements and suggestions.
-    Draft:
-    {draft}
+    streams a single-turn completion and collects the text chunks as they arrive,
+    echoing them to the terminal when ECHO_STREAM is set
     """
-
-    # Get a response from the LLM by creating a chat with the client.
-    response = client.chat.completions.create(
+    global _echoed
+    stream = await client.chat.completions.create(
         model=model,
         messages=[
             {
@@ -55,27 +60,44 @@ def reflect_on_draft(draft: str, model: str = "gpt-5-mini") -> str:
                 "content": prompt
             }
         ],
+        stream=True,
     )
 
-    return response.choices[0].message.content
+    parts = []
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            if ECHO_STREAM:
+                print(chunk.choices[0].delta.content, end="", flush=True)
+
+    if ECHO_STREAM:
+        print()
+        _echoed = True
+
+    return "".join(parts)
 
 
-def revise_draft(original_draft: str, reflection: str, model: str = "gpt-5-mini") -> str:
+@cache.cached(fn_name="generate_draft")
+async def generate_draft(topic: str, model: str = "gpt-5-mini") -> str:
     """
-    improves a given essay draft based on feedback from a reflection step
+    uses a language model to generate a complete draft essay
     """
-    prompt = f"""
-    Revise the essay draft based on the reflection provided.
-    Improve it in terms of clarity and coherence and provide the final essay.
-    
-    Draft:
-    {original_draft}
-    
-    Reflection:
-    {reflection}
+
+    ### START OMIT BLOCK
+    prompt = DRAFT_PROMPT.format(topic=topic)
+
+    return await complete(prompt, model)
+
+
+@cache.cached(fn_name="reflect_and_revise")
+async def reflect_and_revise(draft: str, model: str = "gpt-5-nano") -> EssayRevision:
     """
+    critiques the essay draft and rewrites it in the same call,
+    so the draft is only sent (and prefilled) once
+    """
+    prompt = REVISION_PROMPT.format(draft=draft)
 
-    response = client.chat.completions.create(
+    completion = await client.beta.chat.completions.parse(
         model=model,
         messages=[
             {
@@ -83,30 +105,100 @@ def revise_draft(original_draft: str, reflection: str, model: str = "gpt-5-mini"
                 "content": prompt
             }
         ],
+        response_format=EssayRevision,
     )
 
-    return response.choices[0].message.content
-
+    return completion.choices[0].message.parsed
 
-def main():
-    essay_prompt = "Should social media platforms be regulated by the government?"
 
+async def process_topic(topic: str) -> dict:
+    """
+    runs a single topic through draft -> reflection/revision
+    """
     # Agent 1 – Draft
-    draft = generate_draft(essay_prompt)
-    print("📝 Draft:\n")
-    print(draft)
+    draft = await generate_draft(topic)
 
-    # Agent 2 – Reflection
-    feedback = reflect_on_draft(draft)
-    print("\n🧠 Feedback:\n")
-    print(feedback)
+    # Agent 2 – Reflection + Revision
+    revision = await reflect_and_revise(draft)
 
-    # Agent 3 – Revision
-    revised = revise_draft(draft, feedback)
-    print("\n✍️ Revised:\n")
-    print(revised)
+    return {
+        "topic": topic,
+        "draft": draft,
+        "feedback": revision.critique,
+        "revised": revision.revised,
+    }
 
-if __name__ == "__main__":
-    main()
 
+async def process_topics_batch(topics: list[str], draft_model: str = "gpt-5-mini", revision_model: str = "gpt-5-nano") -> list[dict]:
+    """
+    offline variant of process_topic for many topics: each stage is submitted
+    as a single Batch API job (cheaper, but may take hours to complete)
+    """
+    # Agent 1 – Draft
+    drafts = await run_batch(client, {
+        f"draft_{i}": {
+            "model": draft_model,
+            "messages": [{"role": "user", "content": DRAFT_PROMPT.format(topic=topic)}],
+        }
+        for i, topic in enumerate(topics)
+    })
+    drafts = [drafts[f"draft_{i}"]["choices"][0]["message"]["content"] for i in range(len(topics))]
+
+    # Agent 2 – Reflection + Revision
+    revision_format = strict_response_format(EssayRevision)
+    revisions = await run_batch(client, {
+        f"revise_{i}": {
+            "model": revision_model,
+            "messages": [{"role": "user", "content": REVISION_PROMPT.format(draft=draft)}],
+            "response_format": revision_format,
+        }
+        for i, draft in enumerate(drafts)
+    })
+    revisions = [
+        EssayRevision.model_validate_json(revisions[f"revise_{i}"]["choices"][0]["message"]["content"])
+        for i in range(len(topics))
+    ]
+
+    return [
+        {
+            "topic": topic,
+            "draft": draft,
+            "feedback": revision.critique,
+            "revised": revision.revised,
+        }
+        for topic, draft, revision in zip(topics, drafts, revisions)
+    ]
+
+
+async def main():
+    global ECHO_STREAM
+    essay_prompts = [
+        "Should social media platforms be regulated by the government?",
+    ]
+
+    if "--batch" in sys.argv:
+        results = await process_topics_batch(essay_prompts)
+    else:
+        ECHO_STREAM = len(essay_prompts) == 1
+        if ECHO_STREAM:
+            print(f"\n📌 Topic: {essay_prompts[0]}\n")
+            print("📝 Draft:\n")
+
+        # each topic's steps depend on each other, but the topics themselves are independent
+        results = await asyncio.gather(*[process_topic(t) for t in essay_prompts])
+
+    for result in results:
+        if not ECHO_STREAM:
+            print(f"\n📌 Topic: {result['topic']}\n")
+            print("📝 Draft:\n")
+        if not _echoed:
+            print(result["draft"])
+
+        print("\n🧠 Feedback:\n")
+        print(result["feedback"])
+
+        print("\n✍️ Revised:\n")
+        print(result["revised"])
 
+if __name__ == "__main__":
+    asyncio.run(main())
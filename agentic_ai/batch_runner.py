@@ -0,0 +1,53 @@
+import io
+import json
+import asyncio
+
+
+async def run_batch(client, bodies: dict, poll_interval: float = 30.0) -> dict:
+    """
+    submits chat completion request bodies through the OpenAI Batch API and waits for them.
+    half the price of interactive calls, at the cost of latency (completes within 24h).
+    :param client: AsyncOpenAI client
+    :param bodies: custom_id -> /v1/chat/completions request body
+    :param poll_interval: seconds between status checks
+    :return: custom_id -> chat completion response body
+    """
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        })
+        for custom_id, body in bodies.items()
+    ]
+    batch_file = await client.files.create(
+        file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+        purpose="batch",
+    )
+
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'")
+
+    output = await client.files.content(batch.output_file_id)
+
+    results = {}
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("error") or record["response"]["status_code"] != 200:
+            raise RuntimeError(f"Batch request '{record['custom_id']}' failed: {record.get('error') or record['response']}")
+        results[record["custom_id"]] = record["response"]["body"]
+
+    return results
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import functools
+import inspect
+import sqlite3
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    persistent response cache for LLM calls, stored in sqlite so hits survive across runs.
+    looks up an exact prompt hash first, then falls back to the closest
+    previously seen prompt by embedding cosine similarity.
+    """
+
+    def __init__(self, client, path: str, embedding_model: str = "text-embedding-3-small", threshold: float = 0.95):
+        self.client = client
+        self.path = path
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, namespace TEXT, response TEXT, embedding BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_namespace ON responses (namespace)")
+
+        # namespace -> (normalized embeddings matrix, list of responses), loaded from disk on first use
+        self._vectors = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _hash(namespace: str, prompt: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{prompt.strip()}".encode("utf-8")).hexdigest()
+
+    async def embed(self, prompt: str) -> np.ndarray:
+        response = await self.client.embeddings.create(
+            model=self.embedding_model,
+            input=prompt.strip(),
+        )
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _load(self, namespace: str):
+        if namespace not in self._vectors:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT embedding, response FROM responses WHERE namespace = ? AND embedding IS NOT NULL",
+                    (namespace,),
+                ).fetchall()
+            keys = np.vstack([np.frombuffer(row[0], dtype=np.float32) for row in rows]) if rows else None
+            self._vectors[namespace] = (keys, [row[1] for row in rows])
+        return self._vectors[namespace]
+
+    async def get(self, namespace: str, prompt: str, threshold: float = None, semantic: bool = True):
+        """
+        returns (response, embedding). response is None on a miss; the embedding
+        is handed back so set() doesn't have to embed the same prompt twice.
+        the prompt is only embedded when the namespace has stored embeddings to compare against.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (self._hash(namespace, prompt),)
+            ).fetchone()
+        if row:
+            return row[0], None
+
+        if not semantic:
+            return None, None
+
+        keys, responses = self._load(namespace)
+        if keys is None:
+            return None, None
+
+        vector = await self.embed(prompt)
+        scores = keys @ vector
+        best = int(scores.argmax())
+        if scores[best] >= (threshold or self.threshold):
+            return responses[best], vector
+
+        return None, vector
+
+    async def set(self, namespace: str, prompt: str, response: str, vector: np.ndarray = None, semantic: bool = True):
+        """stores the response; semantic=False keeps it exact-match only and skips the embedding"""
+        if semantic and vector is None:
+            vector = await self.embed(prompt)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (self._hash(namespace, prompt), namespace, response,
+                 vector.astype(np.float32).tobytes() if vector is not None else None),
+            )
+
+        if vector is not None and namespace in self._vectors:
+            keys, responses = self._vectors[namespace]
+            self._vectors[namespace] = (vector[None, :] if keys is None else np.vstack([keys, vector]), responses)
+            responses.append(response)
+
+    def cached(self, fn_name: str, semantic: bool = True):
+        """
+        decorator for async LLM helpers taking text arguments and a `model` keyword.
+        the cache namespace is (fn_name, model) so different steps never share hits.
+        helpers annotated to return a pydantic model are stored as its JSON.
+        """
+
+        def decorator(func):
+            signature = inspect.signature(func)
+            return_type = signature.return_annotation
+            is_model = inspect.isclass(return_type) and hasattr(return_type, "model_validate_json")
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+
+                model = bound.arguments.get("model", "")
+                namespace = f"{fn_name}:{model}"
+                prompt = "\n\n".join(
+                    str(value) for name, value in bound.arguments.items() if name != "model"
+                )
+
+                cached_response, vector = await self.get(namespace, prompt, semantic=semantic)
+                if cached_response is not None:
+                    return return_type.model_validate_json(cached_response) if is_model else cached_response
+
+                if semantic and vector is None:
+                    # nothing to compare against yet: embed for later runs alongside the call, not before it
+                    response, vector = await asyncio.gather(func(*args, **kwargs), self.embed(prompt))
+                else:
+                    response = await func(*args, **kwargs)
+                await self.set(namespace, prompt, response.model_dump_json() if is_model else response, vector, semantic=semantic)
+                return response
+
+            return wrapper
+
+        return decorator
@@ -15,10 +15,15 @@ response = client.chat.completions.create(
             "role": "user",
             "content": "Write a limerick about the Python programming language"
         }
-    ]
+    ],
+    stream=True,
 )
 
-print(response.choices[0].message.content)
+# print tokens as they arrive instead of waiting for the whole completion
+for chunk in response:
+    if chunk.choices and chunk.choices[0].delta.content:
+        print(chunk.choices[0].delta.content, end="", flush=True)
+print()
 
 # There once was a coder so fine,
 # Whose Python skills truly did shine.
@@ -7,6 +7,7 @@
 import os
 import json
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from pydantic import BaseModel, Field
 
@@ -19,8 +20,12 @@ class WeatherReport(BaseModel):
     response: str = Field(description="A brief natural language response to the user question.")
     
     
+# one session for all calls so the keep-alive connection (and its TLS handshake) is reused
+session = requests.Session()
+
+
 def get_weather(lat: float, lon: float):
-    res = requests.get(
+    res = session.get(
         f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,wind_speed_10m&hourly=temperature_2m,relative_humidity_2m,wind_speed_10m"
     )
     
@@ -60,11 +65,17 @@ messages = [
 ]
 
 # First LLM call: “Should I use a tool?”
-completion = client.chat.completions.create(
+# Streamed so any text shows up immediately; the helper reassembles the tool-call deltas for us.
+with client.beta.chat.completions.stream(
     model="gpt-5-nano",
     messages=messages,
     tools=tools,
-)
+) as stream:
+    for event in stream:
+        if event.type == "content.delta":
+            print(event.delta, end="", flush=True)
+
+    completion = stream.get_final_completion()
 
 response = completion.choices[0].message
 
@@ -79,21 +90,33 @@ def call_function(name, args):
         return get_weather(**args)
     
 # human in the loop
-for tool_call in response.tool_calls:
-    name = tool_call.function.name
-    args = json.loads(tool_call.function.arguments)
-    tool_call_id = tool_call.id
-    
-    result = call_function(name, args)
-    
-    messages.append(response)
+# the tool calls are independent HTTP requests, so run them side by side
+with ThreadPoolExecutor() as executor:
+    results = list(executor.map(
+        lambda tool_call: call_function(tool_call.function.name, json.loads(tool_call.function.arguments)),
+        response.tool_calls,
+    ))
+
+# only the fields the API needs to pair tool results with their calls
+messages.append({
+    "role": "assistant",
+    "tool_calls": [
+        {
+            "id": tool_call.id,
+            "type": "function",
+            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+        }
+        for tool_call in response.tool_calls
+    ],
+})
+for tool_call, result in zip(response.tool_calls, results):
     # Feed tool result back to the LLM
     messages.append({
         "role": "tool",
-        "tool_call_id": tool_call_id,
+        "tool_call_id": tool_call.id,
         "content": json.dumps(result)
     })
-    
+
 
 # Second LLM call: structured response
 completion_2 = client.beta.chat.completions.parse(
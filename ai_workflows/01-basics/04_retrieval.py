@@ -1,18 +1,52 @@
 import os
 import json
+import functools
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from pydantic import BaseModel, Field
+import numpy as np
+
+from structured_outputs import strict_response_format
 
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Defining knowledge base
-def search_kb(question: str):
-    """Load the whole knowledge base from the JSON file."""
+@functools.lru_cache(maxsize=1)
+def _load_kb():
+    """Read and parse the knowledge base JSON file once."""
     with open("data/kb.json", "r") as f:
         return json.load(f)
 
 
+def search_kb(question: str):
+    """Return the whole knowledge base (parsed once, then served from memory)."""
+    return _load_kb()
+
+
+# Semantic router: questions close to one the knowledge base already covers
+# skip the "should I use a tool?" LLM call and go straight to search_kb
+KB_ROUTE_THRESHOLD = 0.82
+
+def embed(texts: list[str]) -> np.ndarray:
+    """Embed texts and L2-normalize them, so a dot product is a cosine similarity."""
+    response = client.embeddings.create(model="text-embedding-3-small", input=texts)
+    vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _kb_question_vectors() -> np.ndarray:
+    """Embed the knowledge base questions once; they act as the router's exemplars."""
+    return embed([record["question"] for record in _load_kb()["records"]])
+
+
+def matches_kb(question: str) -> bool:
+    scores = _kb_question_vectors() @ embed([question])[0]
+    return float(scores.max()) >= KB_ROUTE_THRESHOLD
+
+
 # defining search_kb tool
 tools = [
     {
@@ -33,26 +67,8 @@ tools = [
     }
 ]
 
-messages = [
-    {
-        "role": "system",
-        "content": "You are a helpful assistant that answers questions from the knowledge base about our e-commerce store."
-    },
-    {
-        "role": "user",
-        "content": "What is the return policy?"
-    }
-
-]
+SYSTEM_PROMPT = "You are a helpful assistant that answers questions from the knowledge base about our e-commerce store."
 
-completion = client.chat.completions.create(
-    model="gpt-5-nano",
-    messages=messages,
-    tools=tools
-)
-
-print(completion.choices[0].message)
-# ChatCompletionMessage(content=None, refusal=None, role='assistant', annotations=[], audio=None, function_call=None, tool_calls=[ChatCompletionMessageFunctionToolCall(id='call_RNNWTpskLTp21OdIgSOwz9wA', function=Function(arguments='{"question":"What is the return policy?"}', name='search_kb'), type='function')])
 
 def call_function(func_name, args):
     if func_name == "search_kb":
@@ -60,63 +76,136 @@ def call_function(func_name, args):
     return None
 
 
-for tool_call in completion.choices[0].message.tool_calls:
-    name = tool_call.function.name
-    arguments = json.loads(tool_call.function.arguments)
-    tool_call_id = tool_call.id
+class KBResponse(BaseModel):
+    answer: str = Field(description="The answer to the user's question.")
+    source: int = Field(description="The reference id of the answer.")
+
+
+# JSON schemas built once at import instead of on every request
+RESPONSE_FORMATS = {model: strict_response_format(model) for model in [KBResponse]}
 
-    func_result = call_function(name, arguments)
 
-    messages.append(completion.choices[0].message)
-    messages.append(
+def answer_from_kb(question: str) -> KBResponse:
+    """Let the LLM call search_kb (unless the router already matched it), then answer in the KBResponse schema."""
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
         {
-            "role": "tool",
-            "tool_call_id": tool_call_id,
-            "content": json.dumps(func_result),
+            "role": "user",
+            "content": question
         }
+
+    ]
+
+    if matches_kb(question):
+        # the router already knows the answer lives in the knowledge base
+        tool_calls = [
+            SimpleNamespace(
+                id="call_kb_router",
+                function=SimpleNamespace(name="search_kb", arguments=json.dumps({"question": question})),
+            )
+        ]
+    else:
+        # Streamed so any text shows up immediately; the helper reassembles the tool-call deltas for us.
+        with client.beta.chat.completions.stream(
+            model="gpt-5-nano",
+            messages=messages,
+            tools=tools
+        ) as stream:
+            for event in stream:
+                if event.type == "content.delta":
+                    print(event.delta, end="", flush=True)
+
+            completion = stream.get_final_completion()
+
+        print(completion.choices[0].message)
+        # ChatCompletionMessage(content=None, refusal=None, role='assistant', annotations=[], audio=None, function_call=None, tool_calls=[ChatCompletionMessageFunctionToolCall(id='call_RNNWTpskLTp21OdIgSOwz9wA', function=Function(arguments='{"question":"What is the return policy?"}', name='search_kb'), type='function')])
+
+        tool_calls = completion.choices[0].message.tool_calls
+
+    # the tool calls don't depend on each other, so run them side by side
+    with ThreadPoolExecutor() as executor:
+        func_results = list(executor.map(
+            lambda tool_call: call_function(tool_call.function.name, json.loads(tool_call.function.arguments)),
+            tool_calls,
+        ))
+
+    # only the fields the API needs to pair tool results with their calls
+    messages.append({
+        "role": "assistant",
+        "tool_calls": [
+            {
+                "id": tool_call.id,
+                "type": "function",
+                "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+            }
+            for tool_call in tool_calls
+        ],
+    })
+    for tool_call, func_result in zip(tool_calls, func_results):
+        messages.append(
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": json.dumps(func_result),
+            }
+        )
+
+    completion_2 = client.chat.completions.create(
+        model="gpt-5-nano",
+        messages=messages,
+        tools=tools,
+        response_format=RESPONSE_FORMATS[KBResponse],
     )
 
+    return KBResponse.model_validate_json(completion_2.choices[0].message.content)
 
-class KBResponse(BaseModel):
-    answer: str = Field(description="The answer to the user's question.")
-    source: int = Field(description="The reference id of the answer.")
 
+def answer_freeform(question: str) -> str:
+    """Plain streamed answer; the LLM may decide the knowledge base isn't relevant."""
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
 
-completion_2 = client.chat.completions.parse(
-    model="gpt-5-nano",
-    messages=messages,
-    tools=tools,
-    response_format=KBResponse,
-)
+    with client.beta.chat.completions.stream(
+        model="gpt-5-nano",
+        messages=messages,
+        tools=tools,
+    ) as stream:
+        for event in stream:
+            if event.type == "content.delta":
+                print(event.delta, end="", flush=True)
+        print()
 
-response = completion_2.choices[0].message.parsed
+        completion = stream.get_final_completion()
 
-print(f"Response: {response}")
-# Response: answer='Items can be returned within 30 days of purchase with original receipt. Refunds will be processed to the original payment method within 5-7 business days.' source=1
+    return completion.choices[0].message.content
 
-print(f"Answer: {response.answer}")
-print(f"Source: {response.source}")
-# Answer: Items can be returned within 30 days of purchase with original receipt. Refunds will be processed to the original payment method within 5-7 business days.
-# Source: 1
 
+def main():
+    response = answer_from_kb("What is the return policy?")
+
+    print(f"Response: {response}")
+    # Response: answer='Items can be returned within 30 days of purchase with original receipt. Refunds will be processed to the original payment method within 5-7 business days.' source=1
+
+    print(f"Answer: {response.answer}")
+    print(f"Source: {response.source}")
+    # Answer: Items can be returned within 30 days of purchase with original receipt. Refunds will be processed to the original payment method within 5-7 business days.
+    # Source: 1
+
+    answer_freeform("What is the weather in Tokyo?")
+    # I don’t have live weather data in this chat, so I can’t provide the current conditions in Tokyo.
+    #
+    # If you’re asking about shopping-related stuff for Tokyo, I can help with:
+    # - Shipping options and estimated delivery times to Tokyo, Japan
+    # - International shipping rates for a specific item
+    # - Availability of products for Japan
+    #
+    # What would you like me to assist with? If you just need the current weather, please check a weather service like Weather.com, a weather app, or your preferred forecast site.
 
-messages = [
-    {"role": "system", "content": "You are a helpful assistant that answers questions from the knowledge base about our e-commerce store."},
-    {"role": "user", "content": "What is the weather in Tokyo?"},
-]
 
-completion_3 = client.beta.chat.completions.parse(
-    model="gpt-5-nano",
-    messages=messages,
-    tools=tools,
-)
-
-print(completion_3.choices[0].message.content)
-# I don’t have live weather data in this chat, so I can’t provide the current conditions in Tokyo.
-#
-# If you’re asking about shopping-related stuff for Tokyo, I can help with:
-# - Shipping options and estimated delivery times to Tokyo, Japan
-# - International shipping rates for a specific item
-# - Availability of products for Japan
-#
-# What would you like me to assist with? If you just need the current weather, please check a weather service like Weather.com, a weather app, or your preferred forecast site.
+if __name__ == "__main__":
+    main()
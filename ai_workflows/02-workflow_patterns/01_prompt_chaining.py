@@ -1,10 +1,13 @@
 import os
+import asyncio
 import logging
+import functools
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
-from openai import OpenAI
+from openai import AsyncOpenAI
+from structured_outputs import strict_response_format
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,16 +16,45 @@ logging.basicConfig(
     force=True,
 )
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = "gpt-5-nano"
 
+CONFIDENCE_THRESHOLD = 0.7
+
+# smallest model that reliably handles each step
+MODEL_ROUTES = {
+    "classify": MODEL,
+    "extract": "gpt-5-mini",
+    "confirm": MODEL,
+}
+
+
+# Prompts
+# Kept static and placed first in every request so the provider can reuse the cached prefix;
+# anything that changes between calls (like today's date) goes after it.
+EXTRACTION_PROMPT = "Analyze if the text describes a calendar event."
+DETAILS_PROMPT = "Extract detailed event information. When there is relative date references, use the current date given below as reference."
+CONFIRMATION_PROMPT = "Generate a natural language confirmation message for the event. Sign off with name; Koochi"
+
+
+@functools.lru_cache(maxsize=4)
+def _date_context(ymd: str) -> str:
+    day = datetime.strptime(ymd, "%Y-%m-%d")
+    return f"Today is {day.strftime('%A, %B %d, %Y')}."
+
+
+def date_context() -> str:
+    """Today's date sentence, built once per calendar day so the string stays identical between calls"""
+    return _date_context(datetime.now().strftime("%Y-%m-%d"))
+
 
 # Data Models
 class EventExtraction(BaseModel):
     """Basic Event Information"""
-    description: str = Field(description="Raw description of the event")
+    # gate fields come first so they are streamed before the description
     is_calendar_event: bool = Field(description="Whether this text describes a calendar event?")
     confidence_score: float = Field(description="Confidence score, of this being an event, between 0 and 1.")
+    description: str = Field(description="Raw description of the event")
 
 class EventDetails(BaseModel):
     """Specific Event Details"""
@@ -37,8 +69,12 @@ class EventConfirmation(BaseModel):
     calendar_link: Optional[str] = Field(description="Generated link to the calendar event, if applicable.")
 
 
+# JSON schemas built once at import instead of on every request
+RESPONSE_FORMATS = {model: strict_response_format(model) for model in [EventDetails, EventConfirmation]}
+
+
 # Functions
-def extract_event_information(user_input: str) -> EventExtraction:
+async def extract_event_information(user_input: str) -> EventExtraction:
     """
     LLM call to determine if input is a calendar event
     :param user_input: user_input to extract information from
@@ -48,15 +84,18 @@ def extract_event_information(user_input: str) -> EventExtraction:
     logging.info("Starting event extraction analysis.")
     logging.debug(f"User input: {user_input}")
 
-    today = datetime.now()
-    date_context = f"Today is {today.strftime('%A, %B %d, %Y')}."
-
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
+    # Streamed so the gate can be decided as soon as its fields are complete,
+    # without waiting for the description to be decoded.
+    async with client.beta.chat.completions.stream(
+        model=MODEL_ROUTES["classify"],
         messages=[
             {
                 "role": "system",
-                "content": f"{date_context}. Analyze if the text describes a calendar event."
+                "content": EXTRACTION_PROMPT
+            },
+            {
+                "role": "system",
+                "content": date_context()
             },
             {
                 "role": "user",
@@ -64,7 +103,30 @@ def extract_event_information(user_input: str) -> EventExtraction:
             }
         ],
         response_format=EventExtraction
-    )
+    ) as stream:
+        async for event in stream:
+            if event.type != "content.delta" or not isinstance(event.parsed, dict):
+                continue
+
+            partial = event.parsed
+            # the partial parse leaves a string out until it is complete and may hold a number
+            # that is still being decoded, so a field is only taken as final once the next
+            # key shows up in the raw text
+            is_event_final = '"confidence_score"' in event.snapshot
+            score_final = '"description"' in event.snapshot
+
+            if (
+                (is_event_final and partial["is_calendar_event"] is False) or
+                (score_final and partial["confidence_score"] < CONFIDENCE_THRESHOLD)
+            ):
+                logging.info("Gate fields are conclusive, stopping extraction early.")
+                return EventExtraction(
+                    is_calendar_event=partial["is_calendar_event"],
+                    confidence_score=partial["confidence_score"] if score_final else 0.0,
+                    description="",
+                )
+
+        completion = await stream.get_final_completion()
 
     result = completion.choices[0].message.parsed
 
@@ -73,30 +135,31 @@ def extract_event_information(user_input: str) -> EventExtraction:
     return result
 
 
-def parse_event_details(description: str) -> EventDetails:
+async def parse_event_details(description: str) -> EventDetails:
     """Extract specific event details"""
 
     logging.info("Starting event details parsing")
 
-    today = datetime.now()
-    date_context = f"Today is {today.strftime('%A, %B %d, %Y')}."
-
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
+    completion = await client.chat.completions.create(
+        model=MODEL_ROUTES["extract"],
         messages=[
             {
                 "role": "system",
-                "content": f"{date_context}. Extract detailed event information. When there is relative date references, use this current date as reference."
+                "content": DETAILS_PROMPT
+            },
+            {
+                "role": "system",
+                "content": date_context()
             },
             {
                 "role": "user",
                 "content": f"{description}",
             }
         ],
-        response_format=EventDetails
+        response_format=RESPONSE_FORMATS[EventDetails]
     )
 
-    result = completion.choices[0].message.parsed
+    result = EventDetails.model_validate_json(completion.choices[0].message.content)
 
     logging.info(f"Parsed Event Details:\nName: {result.name}\nDate = {result.date}\nDuration = {result.duration} minutes.")
     logging.info(f"Participants: {', '.join(result.participants)}")
@@ -104,27 +167,32 @@ def parse_event_details(description: str) -> EventDetails:
     return result
 
 
-def generate_confirmation(event_details: EventDetails) -> EventConfirmation:
+async def generate_confirmation(event_details: EventDetails) -> EventConfirmation:
     """Generates a confirmation message"""
 
     logging.info("Generating confirmation message.")
 
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
+    completion = await client.chat.completions.create(
+        model=MODEL_ROUTES["confirm"],
         messages=[
             {
                 "role": "system",
-                "content": f"Generate a natural language confirmation message for the event. Sign off with name; Koochi"
+                "content": CONFIRMATION_PROMPT
             },
             {
                 "role": "user",
-                "content": f"{str(event_details.model_dump())}",
+                "content": (
+                    f"name={event_details.name}\n"
+                    f"date={event_details.date}\n"
+                    f"duration={event_details.duration}\n"
+                    f"participants={','.join(event_details.participants)}"
+                ),
             }
         ],
-        response_format=EventConfirmation
+        response_format=RESPONSE_FORMATS[EventConfirmation]
     )
 
-    result = completion.choices[0].message.parsed
+    result = EventConfirmation.model_validate_json(completion.choices[0].message.content)
 
     logging.info(f"Confirmation message generated successfully.")
 
@@ -132,15 +200,15 @@ def generate_confirmation(event_details: EventDetails) -> EventConfirmation:
 
 
 # Chaining workflow
-def process_calendar_request(user_input: str) -> Optional[EventConfirmation]:
+async def process_calendar_request(user_input: str) -> Optional[EventConfirmation]:
     """Prompt chaining workflow with gate check"""
 
     logging.info("Starting calendar request processing.")
 
-    initial_extraction = extract_event_information(user_input)
+    initial_extraction = await extract_event_information(user_input)
     if (
         not initial_extraction.is_calendar_event or
-        initial_extraction.confidence_score < 0.7
+        initial_extraction.confidence_score < CONFIDENCE_THRESHOLD
     ):
         logging.warning("Gate check failed")
 
@@ -148,26 +216,41 @@ def process_calendar_request(user_input: str) -> Optional[EventConfirmation]:
 
     logging.info("Gate check passed, proceeding with event processing.")
 
-    event_details = parse_event_details(initial_extraction.description)
-    event_confirmation = generate_confirmation(event_details)
+    event_details = await parse_event_details(initial_extraction.description)
+    event_confirmation = await generate_confirmation(event_details)
 
     logging.info("Calendar request processing completed successfully.")
 
     return event_confirmation
 
 
+async def process_calendar_requests(user_inputs: list[str]) -> list[Optional[EventConfirmation]]:
+    """Runs independent calendar requests concurrently, each through its own chain"""
+
+    logging.info(f"Processing {len(user_inputs)} calendar request(s).")
+
+    return await asyncio.gather(
+        *(process_calendar_request(user_input) for user_input in user_inputs)
+    )
+
+
 
-# Testing with user's prompt
-prompt = "Let's schedule a 1h team meeting next Tuesday at 2pm with Alice and Bob to discuss the project roadmap."
+# Testing with user's prompts
+prompts = [
+    "Let's schedule a 1h team meeting next Tuesday at 2pm with Alice and Bob to discuss the project roadmap.",
+    "What's the weather like today?",
+]
 
-response = process_calendar_request(prompt)
-if response:
-    print(f"Confirmation: {response.message}")
-    if response.calendar_link:
-        print(f"Calendar Link: {response.calendar_link}")
+responses = asyncio.run(process_calendar_requests(prompts))
+for prompt, response in zip(prompts, responses):
+    print(f"Request: {prompt}")
+    if response:
+        print(f"Confirmation: {response.message}")
+        if response.calendar_link:
+            print(f"Calendar Link: {response.calendar_link}")
 
-else:
-    print("This doesn't appear to be a valid calendar request.")
+    else:
+        print("This doesn't appear to be a valid calendar request.")
 
 
 
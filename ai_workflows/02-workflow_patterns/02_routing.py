@@ -1,9 +1,13 @@
 import os
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal, Optional
 from pydantic import BaseModel, Field
+import numpy as np
 
 from openai import OpenAI
+from structured_outputs import strict_response_format
 
 
 logging.basicConfig(
@@ -16,13 +20,46 @@ logging.basicConfig(
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = "gpt-5-nano"
 
+# runs the LLM router while the semantic pre-router embeds the same request
+executor = ThreadPoolExecutor(max_workers=2)
+
+
+# Prompts
+# Kept as a constant so every request starts with the exact same prefix (cacheable by the provider).
+ROUTER_PROMPT = (
+    "Determine if this is a request to create a new event or to modify an existing event. "
+    "Also extract the event details: for a new event, fill new_event with the details for creating it; "
+    "for a modification, fill modify_event with the details for modifying the existing event. "
+    "Leave the other one null."
+)
 
-# Data models
-class CalendarRequestType(BaseModel):
-    """Determine the type of calendar request"""
-    request_type: Literal["new_event", "modify_event"] = Field("Type of calendar request being made.")
-    confidence_score: float = Field("Confidence score between 0 and 1.")
-    description: str =  Field("Cleaned description of the request.")
+
+# Labelled examples for the local semantic router; requests clearly closest to
+# "not_calendar" are rejected without an LLM call
+ROUTER_EXEMPLARS = {
+    "new_event": [
+        "Schedule a meeting with the team tomorrow at 10am",
+        "Set up a call with Sarah next Monday afternoon",
+        "Book a 30 minute sync with Alice and Bob on Friday",
+        "Create an event for the product launch on March 3rd",
+        "Add a dentist appointment to my calendar for Thursday at 4pm",
+    ],
+    "modify_event": [
+        "Move the team meeting to Wednesday at 3pm",
+        "Reschedule my call with Sarah to next week",
+        "Add Charlie to the project kickoff meeting",
+        "Change the location of tomorrow's standup to room 4",
+        "Push the design review back by an hour",
+    ],
+    "not_calendar": [
+        "What's the weather like today?",
+        "Tell me a joke",
+        "How do I reverse a list in Python?",
+        "What is the capital of France?",
+        "Summarize this article for me",
+    ],
+}
+SEMANTIC_ROUTE_THRESHOLD = 0.82
 
 class NewEventDetails(BaseModel):
     """Details for creating a new event"""
@@ -43,6 +80,15 @@ class ModifyEventDetails(BaseModel):
     participants_to_add: list[str] = Field("List of new participants to add")
     participants_to_remove: list[str] = Field("List of new participants to remove")
 
+class CalendarRequestType(BaseModel):
+    """Determine the type of calendar request, along with its extracted details"""
+    request_type: Literal["new_event", "modify_event"] = Field("Type of calendar request being made.")
+    confidence_score: float = Field("Confidence score between 0 and 1.")
+    description: str =  Field("Cleaned description of the request.")
+    # one field per request type instead of a union, so the details never resolve to the wrong model
+    new_event: Optional[NewEventDetails] = Field(default=None, description="Details for a new_event request, null otherwise.")
+    modify_event: Optional[ModifyEventDetails] = Field(default=None, description="Details for a modify_event request, null otherwise.")
+
 class CalendarResponse(BaseModel):
     """Format of the final response for calendar event request"""
     success: bool = Field("Whether or not the calendar request was successful")
@@ -50,56 +96,70 @@ class CalendarResponse(BaseModel):
     calendar_link: Optional[str] = Field("Link to the calendar request, if applicable")
 
 
+# JSON schemas built once at import instead of on every request
+RESPONSE_FORMATS = {model: strict_response_format(model) for model in [CalendarRequestType]}
+
+
 # Routing and processing functions
+def embed(texts: list[str]) -> np.ndarray:
+    """Embed texts and L2-normalize them, so a dot product is a cosine similarity"""
+
+    response = client.embeddings.create(model="text-embedding-3-small", input=texts)
+    vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _exemplar_index() -> tuple[list[str], np.ndarray]:
+    """Embed the router exemplars once"""
+
+    labels = [label for label, examples in ROUTER_EXEMPLARS.items() for _ in examples]
+    vectors = embed([example for examples in ROUTER_EXEMPLARS.values() for example in examples])
+    return labels, vectors
+
+
+def semantic_route(user_input: str) -> Optional[str]:
+    """Nearest-exemplar label for the request, or None when no exemplar is close enough"""
+
+    labels, vectors = _exemplar_index()
+    scores = vectors @ embed([user_input])[0]
+    best = int(scores.argmax())
+
+    logging.info(f"Semantic route: {labels[best]} (similarity {scores[best]:.2f})")
+    return labels[best] if scores[best] >= SEMANTIC_ROUTE_THRESHOLD else None
+
+
 def route_calendar_request(user_input: str) -> CalendarRequestType:
-    """Route the calendar request to the appropriate type"""
+    """Route the calendar request to the appropriate type and extract its details in the same call"""
 
     logging.info("Routing calendar request")
 
-    completion = client.beta.chat.completions.parse(
+    completion = client.chat.completions.create(
         model=MODEL,
         messages=[
             {
                 "role": "system",
-                "content": "Determine if this is a request to create a new event or to modify an existing event",
+                "content": ROUTER_PROMPT,
             },
             {
                 "role": "user",
                 "content": f"{user_input}"
             }
         ],
-        response_format=CalendarRequestType
+        response_format=RESPONSE_FORMATS[CalendarRequestType]
     )
 
-    result = completion.choices[0].message.parsed
+    result = CalendarRequestType.model_validate_json(completion.choices[0].message.content)
 
     logging.info(f"Request routed as {result.request_type} with a confidence of {result.confidence_score*100: .1f}%")
     return result
 
 
-def handle_new_event(description: str) -> CalendarResponse:
+def handle_new_event(details: NewEventDetails) -> CalendarResponse:
     """Handle the new event request"""
 
     logging.info("Processing the new event request")
-
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": "Extract the event details for creating a new calendar event",
-            },
-            {
-                "role": "user",
-                "content": f"{description}"
-            }
-        ],
-        response_format=NewEventDetails
-    )
-
-    details = completion.choices[0].message.parsed
-
-    logging.info(f"New Event details extracted.\n{details.model_dump()}")
+    logging.info(f"New Event details extracted.\n{details.model_dump_json()}")
 
     return CalendarResponse(
         success=True,
@@ -107,29 +167,11 @@ def handle_new_event(description: str) -> CalendarResponse:
         calendar_link=f"calendar://new?event={details.name}",
     )
 
-def handle_modify_event(description: str) -> CalendarResponse:
+def handle_modify_event(details: ModifyEventDetails) -> CalendarResponse:
     """Process event modification request"""
 
     logging.info("Processing the modify event request")
-
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": "Extract the event details for modifying an existing calendar event",
-            },
-            {
-                "role": "user",
-                "content": f"{description}"
-            }
-        ],
-        response_format=ModifyEventDetails
-    )
-
-    details = completion.choices[0].message.parsed
-
-    logging.info(f"Event details extracted.\n{details.model_dump()}")
+    logging.info(f"Event details extracted.\n{details.model_dump_json()}")
 
     return CalendarResponse(
         success=True,
@@ -142,15 +184,25 @@ def process_calendar_request(user_input: str) -> CalendarResponse:
 
     logging.info("Processing calendar request")
 
-    route_result = route_calendar_request(user_input)
+    # the LLM router also extracts the event details, so it is needed for every calendar request;
+    # it starts alongside the semantic pre-router, which can then only add latency to rejections
+    route_future = executor.submit(route_calendar_request, user_input)
+    if semantic_route(user_input) == "not_calendar":
+        # a request already in flight can't be aborted, but its result is never waited on
+        route_future.cancel()
+        logging.info("Not a calendar request, not moving forward.")
+        return None
+
+    route_result = route_future.result()
     if route_result.confidence_score < 0.7:
         logging.info("Low confidence score, not moving forward.")
         return None
 
-    if route_result.request_type == "new_event":
-        return handle_new_event(route_result.description)
-    elif route_result.request_type == "modify_event":
-        return handle_modify_event(route_result.description)
+    # the router already extracted the details, so no second LLM call is needed
+    if route_result.request_type == "new_event" and route_result.new_event is not None:
+        return handle_new_event(route_result.new_event)
+    elif route_result.request_type == "modify_event" and route_result.modify_event is not None:
+        return handle_modify_event(route_result.modify_event)
     else:
         logging.info("Unknown calendar request type")
         return None
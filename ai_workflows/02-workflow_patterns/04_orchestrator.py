@@ -1,9 +1,15 @@
 import os
+import json
+import asyncio
+import hashlib
+import functools
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pydantic import BaseModel, Field
 
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from semantic_cache import SemanticCache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,8 +18,15 @@ logging.basicConfig(
     force=True,
 )
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# shared by every call so requests reuse one connection pool
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = "gpt-5-nano"
+# max concurrent section requests, to stay within rate limits
+MAX_CONCURRENT_SECTIONS = 5
+
+# similar requests (e.g. near-identical topics) from earlier runs are answered from here instead of the API;
+# calls within a run are concurrent, so they can't hit each other
+cache = SemanticCache(client, os.getenv("SEMANTIC_CACHE", "/tmp/semantic_cache.sqlite3"), threshold=0.92)
 
 
 # Data Models
@@ -23,16 +36,29 @@ class SubTask(BaseModel):
     style_guide: str = Field("Writing style for the section")
     target_length: int = Field("Target word count for this section")
 
+class SectionContent(BaseModel):
+    """Section content for blog writing"""
+    content: str = Field("Written content for the section")
+    key_points: list[str] = Field("Main points covered by the section")
+
 class OrchestratorPlan(BaseModel):
     """Plan for blog structure and sub-tasks"""
     topic_analysis: str = Field("Analysis of the blog topic")
     target_audience: str = Field("Potential audience for the blog")
     sections: list[SubTask] = Field("List of sections to write")
+    first_section_draft: Optional[SectionContent] = Field(
+        default=None, description="Draft of the first planned section, written along with the plan"
+    )
 
-class SectionContent(BaseModel):
-    """Section content for blog writing"""
-    content: str = Field("Written content for the section")
-    key_points: list[str] = Field("Main points covered by the section")
+class WrittenSection(BaseModel):
+    """Section content tagged with the section it was written for"""
+    section_type: str = Field(description="Section type, exactly as given in the plan")
+    content: str = Field(description="Written content for the section")
+    key_points: list[str] = Field(description="Main points covered by the section")
+
+class AllSections(BaseModel):
+    """Content for every planned section, written in one pass"""
+    sections: list[WrittenSection] = Field(description="One entry per planned section, in plan order")
 
 class SuggestedEdits(BaseModel):
     """Suggested edits for a section"""
@@ -54,12 +80,10 @@ class BlogPost(BaseModel):
     review: ReviewFeedback =  Field("Feedback review for improvement suggestions.")
 
 # Prompts
+# The system prompts are static (identical bytes on every call) so the provider can cache
+# them as a shared prefix; everything request-specific goes into the *_INPUT user messages.
 ORCHESTRATOR_PROMPT = """
-Analyze this blog topic and break it down into logical sections.
-
-Topic: {topic}
-Target Length: {target_length} words
-Style: {style}
+Analyze the blog topic given by the user and break it down into logical sections.
 
 Return your response in this format:
 
@@ -77,15 +101,19 @@ Define the target audience and their interests/needs.
 - Style: writing style guidelines
 
 [Additional sections as needed...]
+
+# First Section Draft
+Write the content and key points of the first section, following its description and style.
 """
 
-WORKER_PROMPT = """
-Write a blog section based on:
+ORCHESTRATOR_INPUT = """
 Topic: {topic}
-Section Type: {section_type}
-Section Goal: {description}
-Style Guide: {style_guide}
-Note: {previous_sections}
+Target Length: {target_length} words
+Style: {style}
+"""
+
+WORKER_PROMPT = """
+Write a blog section based on the details given by the user.
 
 Return your response in this format:
 
@@ -98,14 +126,31 @@ Return your response in this format:
 [Additional points as needed...]
 """
 
-REVIEWER_PROMPT = """
-Review this blog post for cohesion and flow:
+WORKER_INPUT = """
+Topic: {topic}
+Section Type: {section_type}
+Section Goal: {description}
+Style Guide: {style_guide}
+Note: {previous_sections}
+"""
+
+ALL_SECTIONS_PROMPT = """
+Write every section of a blog post based on the topic and sections given by the user.
 
+Write each section following its goal and style guide, so the sections flow together without overlapping.
+Return one entry per section, in the same order, using the section type exactly as given.
+For each entry provide the section content and the main points it covers.
+"""
+
+ALL_SECTIONS_INPUT = """
 Topic: {topic}
-Target Audience: {audience}
 
 Sections:
 {sections}
+"""
+
+REVIEWER_PROMPT = """
+Review the blog post given by the user for cohesion and flow.
 
 Provide a cohesion score between 0.0 and 1.0, suggested edits for each section if needed, and a final polished version of the complete post.
 
@@ -114,64 +159,147 @@ For suggested edits, focus on improving transitions and maintaining consistent t
 The final version should incorporate your suggested improvements into a polished, cohesive blog post.
 """
 
+REVIEWER_INPUT = """
+Topic: {topic}
+Target Audience: {audience}
+
+Sections:
+{sections}
+"""
+
+@functools.lru_cache(maxsize=None)
+def cache_namespace(system_prompt: str, response_format: type[BaseModel]) -> str:
+    """Hash of model, system prompt and response schema; the prompts are static so this is computed once per step"""
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(f"{MODEL}\x00{system_prompt}\x00{schema}".encode("utf-8")).hexdigest()
+
+
+async def parse_cached(messages: list[dict], response_format: type[BaseModel], semantic: bool = True) -> BaseModel:
+    """
+    Structured LLM call behind the semantic cache.
+    Only the user message is embedded; model, system prompt and response schema form the
+    namespace, so different steps or schemas never share hits.
+    semantic=False only reuses exact prompt matches and never embeds.
+    """
+
+    system_prompt = "".join(m["content"] for m in messages if m["role"] == "system")
+    user_prompt = "\n\n".join(m["content"] for m in messages if m["role"] != "system")
+    namespace = cache_namespace(system_prompt, response_format)
+
+    cached, vector = await cache.get(namespace, user_prompt, semantic=semantic)
+    if cached is not None:
+        logging.info(f"Cache hit for {response_format.__name__}")
+        return response_format.model_validate_json(cached)
+
+    request = client.beta.chat.completions.parse(
+        model=MODEL,
+        messages=messages,
+        response_format=response_format
+    )
+    if semantic and vector is None:
+        # nothing stored to compare against yet: embed for later runs alongside the call, not before it
+        completion, vector = await asyncio.gather(request, cache.embed(user_prompt))
+    else:
+        completion = await request
+    result = completion.choices[0].message.parsed
+
+    await cache.set(namespace, user_prompt, result.model_dump_json(), vector, semantic=semantic)
+    return result
+
+
 class BlogOrchestrator:
     def __init__(self):
         self.sections_content = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_SECTIONS)
 
     # Routing Functions
-    def get_orchestrator_plan(self, topic_name: str, target_length: int, writing_style: str) -> OrchestratorPlan:
+    async def get_orchestrator_plan(self, topic_name: str, target_length: int, writing_style: str) -> OrchestratorPlan:
         """Retrieves the plan for blog writing"""
 
-        completion = client.beta.chat.completions.parse(
-            model=MODEL,
+        plan = await parse_cached(
             messages=[
                 {
                     "role": "system",
-                    "content": ORCHESTRATOR_PROMPT.format(topic=topic_name,
-                                                          target_length=target_length,
-                                                          style=writing_style),
+                    "content": ORCHESTRATOR_PROMPT,
+                },
+                {
+                    "role": "user",
+                    "content": ORCHESTRATOR_INPUT.format(topic=topic_name,
+                                                         target_length=target_length,
+                                                         style=writing_style),
                 }
             ],
             response_format=OrchestratorPlan
         )
 
-        plan = completion.choices[0].message.parsed
-
         return plan
 
 
-    def write_section(self, topic_name: str, section: SubTask) -> SectionContent:
-        """Writes a specific blog section with previous section context"""
+    async def write_section(self, topic_name: str, section: SubTask, plan: OrchestratorPlan) -> SectionContent:
+        """Writes a specific blog section, aware of the other planned sections"""
 
-        previous_sections = "\n".join(
-            [
-                f"=== {section_type} ===\n{content.content}"
-                for section_type, content in self.sections_content.items()
-            ]
+        # Sections are written concurrently, so instead of the previous sections' content
+        # the note lists what the rest of the post covers to avoid overlap.
+        other_sections = ", ".join(
+            s.section_type for s in plan.sections if s.section_type != section.section_type
         )
 
-        completion = client.beta.chat.completions.parse(
-            model=MODEL,
+        async with self._semaphore:
+            section_content = await parse_cached(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": WORKER_PROMPT,
+                    },
+                    {
+                        "role": "user",
+                        "content": WORKER_INPUT.format(topic=topic_name,
+                                                       section_type=section.section_type,
+                                                       description=section.description,
+                                                       style_guide=section.style_guide,
+                                                       previous_sections=f"Other sections of this post: {other_sections}" if other_sections else "This is the only section."
+                                                       ),
+                    }
+                ],
+                # prompts differ only in the section fields, so a near match could be another section
+                response_format=SectionContent,
+                semantic=False,
+            )
+
+        return section_content
+
+
+    async def write_all_sections(self, topic_name: str, plan: OrchestratorPlan, sections: List[SubTask] = None) -> Dict[str, SectionContent]:
+        """Writes the planned sections (all by default) in a single request, so the shared context is only sent once"""
+
+        sections_text = "\n".join(
+            f"- Type: {section.section_type}\n  Goal: {section.description}\n  Style Guide: {section.style_guide}"
+            for section in (plan.sections if sections is None else sections)
+        )
+
+        written = await parse_cached(
             messages=[
                 {
                     "role": "system",
-                    "content": WORKER_PROMPT.format(topic=topic_name,
-                                                    section_type=section.section_type,
-                                                    description=section.description,
-                                                    style_guide=section.style_guide,
-                                                    previous_sections=f"Previous sections:{previous_sections}" if previous_sections else "This is the first section."
-                                                    ),
+                    "content": ALL_SECTIONS_PROMPT,
+                },
+                {
+                    "role": "user",
+                    "content": ALL_SECTIONS_INPUT.format(topic=topic_name,
+                                                         sections=sections_text),
                 }
             ],
-            response_format=SectionContent
+            response_format=AllSections,
+            semantic=False,
         )
 
-        section_content = completion.choices[0].message.parsed
-
-        return section_content
+        return {
+            section.section_type: SectionContent(content=section.content, key_points=section.key_points)
+            for section in written.sections
+        }
 
 
-    def review_blog_post(self, topic_name: str, plan: OrchestratorPlan) -> ReviewFeedback:
+    async def review_blog_post(self, topic_name: str, plan: OrchestratorPlan) -> ReviewFeedback:
         """Analyzes and improve the overall blog cohesion and flow"""
         sections_text = "\n\n".join(
             [
@@ -180,45 +308,65 @@ class BlogOrchestrator:
             ]
         )
 
-        completion = client.beta.chat.completions.parse(
-            model=MODEL,
+        review = await parse_cached(
             messages=[
                 {
                     "role": "system",
-                    "content": REVIEWER_PROMPT.format(topic=topic_name,
-                                                      audience=plan.target_audience,
-                                                      sections=sections_text
-                                                    ),
+                    "content": REVIEWER_PROMPT,
+                },
+                {
+                    "role": "user",
+                    "content": REVIEWER_INPUT.format(topic=topic_name,
+                                                     audience=plan.target_audience,
+                                                     sections=sections_text
+                                                     ),
                 }
             ],
             response_format=ReviewFeedback
         )
 
-        review = completion.choices[0].message.parsed
-
         return review
 
 
-    def write_blog(self, topic_name: str, target_length: int= 1000, writing_style: str="informative") -> BlogPost:
+    async def write_blog(self, topic_name: str, target_length: int= 1000, writing_style: str="informative") -> BlogPost:
         """Processes the entire blog writing task"""
         logging.info(f"Starting blog writing for topic '{topic_name}'...")
 
         logging.info(f"Planning blog structure")
-        plan = self.get_orchestrator_plan(topic_name, target_length, writing_style)
+        plan = await self.get_orchestrator_plan(topic_name, target_length, writing_style)
         logging.info(f"Plan processed.")
 
         # print(plan.model_dump())
 
-        logging.info("Writing sections...")
-        for section in plan.sections:
-            logging.info(f"Writing '{section.section_type}' section")
-            section_content = self.write_section(topic_name, section)
-            self.sections_content[section.section_type] = section_content
+        # the plan call drafts the first section speculatively, saving a round trip on the critical path
+        written = {}
+        remaining = plan.sections
+        if plan.first_section_draft is not None and plan.sections:
+            written[plan.sections[0].section_type] = plan.first_section_draft
+            remaining = plan.sections[1:]
+
+        if remaining:
+            logging.info(f"Writing {len(remaining)} sections...")
+            written.update(await self.write_all_sections(topic_name, plan, remaining))
+
+        # any section the batched call skipped is written on its own (concurrently)
+        missing = [section for section in plan.sections if section.section_type not in written]
+        if missing:
+            logging.info(f"Writing {len(missing)} missing section(s) individually")
+            sections = await asyncio.gather(
+                *[self.write_section(topic_name, section, plan) for section in missing]
+            )
+            written.update(
+                {section.section_type: section_content for section, section_content in zip(missing, sections)}
+            )
+
+        # keep the planned order
+        self.sections_content = {section.section_type: written[section.section_type] for section in plan.sections}
 
         logging.info(f"Blog writing complete.")
 
         logging.info("Reviewing full blog post")
-        review = self.review_blog_post(topic_name, plan)
+        review = await self.review_blog_post(topic_name, plan)
 
         logging.info("Process complete.")
 
@@ -234,11 +382,11 @@ if __name__ == "__main__":
     blog_writer = BlogOrchestrator()
 
     topic = "The impact of AI on software development"
-    blog = blog_writer.write_blog(
+    blog = asyncio.run(blog_writer.write_blog(
         topic_name=topic,
         target_length=1200,
         writing_style="informative"
-    )
+    ))
 
     print(f"Final Blog Post: \n{blog.review.final_version}")
     print(f"Cohesion score: {blog.review.cohesion_score}")
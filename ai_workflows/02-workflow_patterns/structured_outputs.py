@@ -0,0 +1,54 @@
+from pydantic import BaseModel
+
+
+def _make_strict(node, defs: dict):
+    """
+    rewrites one JSON schema node the way strict structured outputs need it:
+    every object is closed and lists all its properties as required, and defaults are dropped.
+    """
+    if isinstance(node, list):
+        return [_make_strict(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    # a $ref with sibling keys (e.g. a description) or a single-entry allOf is inlined
+    if "$ref" in node and len(node) > 1:
+        ref = node["$ref"].split("/")[-1]
+        node = {**defs[ref], **{k: v for k, v in node.items() if k != "$ref"}}
+    if "allOf" in node and len(node["allOf"]) == 1:
+        node = {**node["allOf"][0], **{k: v for k, v in node.items() if k != "allOf"}}
+        return _make_strict(node, defs)
+
+    strict = {}
+    for key, value in node.items():
+        if key == "default":
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _make_strict(schema, defs) for name, schema in value.items()}
+        elif key in ("items", "anyOf", "oneOf", "allOf", "prefixItems"):
+            strict[key] = _make_strict(value, defs)
+        else:
+            strict[key] = value
+
+    if strict.get("type") == "object":
+        strict["additionalProperties"] = False
+        strict["required"] = list(strict.get("properties", {}))
+    return strict
+
+
+def strict_json_schema(model: type[BaseModel]) -> dict:
+    """JSON schema of the model in the form `"strict": True` structured outputs accept"""
+    schema = model.model_json_schema()
+    return _make_strict(schema, schema.get("$defs", {}))
+
+
+def strict_response_format(model: type[BaseModel]) -> dict:
+    """`response_format` for raw chat completion requests (no `.parse` helper), e.g. Batch API lines"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": strict_json_schema(model),
+            "strict": True,
+        },
+    }
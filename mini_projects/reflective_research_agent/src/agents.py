@@ -1,13 +1,12 @@
 from datetime import datetime
 from aisuite import Client
-from .research_tools import (
-    arxiv_search_tool,
-    tavily_search_tool,
-    wikipedia_search_tool,
-)
+from .tool_map import tool_defs, run_tool_calls_sync
 
 client = Client()
 
+# max model turns of the research agent's tool loop
+MAX_TOOL_TURNS = 5
+
 
 # === Research Agent ===
 def research_agent(
@@ -76,38 +75,48 @@ def research_agent(
     """.strip()
 
     messages = [{"role": "user", "content": full_prompt}]
-    tools = [arxiv_search_tool, tavily_search_tool, wikipedia_search_tool]
 
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-            max_turns=5,
-            temperature=0.0,  # Use deterministic output
-        )
-
-        content = resp.choices[0].message.content or ""
-
-        # ---- Collect tool calls from intermediate_responses and intermediate_messages
+        # tool calls are dispatched here instead of by aisuite (max_turns), so the calls
+        # requested in one turn run concurrently rather than one after another
         calls = []
+        for _ in range(MAX_TOOL_TURNS):
+            resp = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=list(tool_defs),
+                tool_choice="auto",
+                temperature=0.0,  # Use deterministic output
+            )
+            message = resp.choices[0].message
+            tool_calls = getattr(message, "tool_calls", None) or []
+            if not tool_calls:
+                break
+
+            calls.extend((tc.function.name, tc.function.arguments) for tc in tool_calls)
+            messages.append({
+                "role": "assistant",
+                "content": message.content or "",
+                "tool_calls": [
+                    {
+                        "id": tc.id,
+                        "type": "function",
+                        "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+                    }
+                    for tc in tool_calls
+                ],
+            })
+            messages.extend(run_tool_calls_sync(tool_calls))
+        else:
+            # out of tool turns: answer from the results gathered so far
+            resp = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.0,
+            )
+            message = resp.choices[0].message
 
-        # A) From intermediate_responses
-        for ir in getattr(resp, "intermediate_responses", []) or []:
-            try:
-                tcs = ir.choices[0].message.tool_calls or []
-                for tc in tcs:
-                    calls.append((tc.function.name, tc.function.arguments))
-            except Exception:
-                pass
-
-        # B) From intermediate_messages on the final message
-        for msg in getattr(resp.choices[0].message, "intermediate_messages", []) or []:
-            # assistant message with tool_calls
-            if hasattr(msg, "tool_calls") and msg.tool_calls:
-                for tc in msg.tool_calls:
-                    calls.append((tc.function.name, tc.function.arguments))
+        content = message.content or ""
 
         # Dedup while preserving order
         seen = set()
@@ -1,16 +1,52 @@
 import os
-import wikipedia
+import functools
 from typing import List, Dict
 from dotenv import load_dotenv
 from tavily import TavilyClient
-import time, requests, xml.etree.ElementTree as ET
+import requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+# lxml parses the arXiv feed in C; both expose the same find/findtext API used below
+try:
+    from lxml import etree as ET
+    XMLParseError = ET.XMLSyntaxError
+except ImportError:
+    import xml.etree.ElementTree as ET
+    XMLParseError = ET.ParseError
 
 # utils
-from .utils import clean_text, ensure_pdf_url, fetch_pdf_bytes, pdf_bytes_to_text, build_session
+from .utils import (
+    ensure_pdf_url, fetch_pdf_bytes, extract_pdf_text, looks_unreadable, build_session,
+    RateLimiter, PdfTextCache, arxiv_id_from_url,
+)
 
 load_dotenv()
 session = build_session()
 
+# arXiv asks for no more than one request every 3 seconds to its API (export.arxiv.org)
+arxiv_rate_limiter = RateLimiter(min_interval=3.0)
+# PDF downloads (arxiv.org) get their own, shorter bucket so they don't queue behind the API
+pdf_rate_limiter = RateLimiter(min_interval=1.0)
+
+# extracted text survives across queries and runs
+pdf_text_cache = PdfTextCache(os.getenv("ARXIV_TEXT_CACHE", "/tmp/arxiv_txt.sqlite3"))
+
+
+def _fetch_pdf_rate_limited(pdf_url: str, max_bytes: int = None) -> bytes:
+    pdf_rate_limiter.wait()
+    return fetch_pdf_bytes(session, pdf_url, timeout=90, max_bytes=max_bytes)
+
+
+# created on first use so importing the tools doesn't spawn processes
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _process_pool
+
 
 # ----- arXiv search -----
 def arxiv_search_tool(
@@ -26,7 +62,8 @@ def arxiv_search_tool(
     _MAX_PAGES = 6
     _TEXT_CHARS = 5000
     _SAVE_FULL_TEXT = False
-    _SLEEP_SECONDS = 1.0
+    _MAX_FETCH_WORKERS = 4
+    _MAX_PDF_BYTES = 3_000_000  # the first pages almost always fit; None downloads everything
     # ==========================
 
     api_url = (
@@ -36,6 +73,7 @@ def arxiv_search_tool(
 
     out: List[Dict] = []
     try:
+        arxiv_rate_limiter.wait()
         resp = session.get(api_url, timeout=60)
         resp.raise_for_status()
     except requests.exceptions.RequestException as e:
@@ -72,44 +110,96 @@ def arxiv_search_tool(
             if not link_pdf and url_abs:
                 link_pdf = ensure_pdf_url(url_abs)
 
-            item = {
+            out.append({
                 "title": title,
                 "authors": authors,
                 "published": published,
                 "url": url_abs,
                 "summary": abstract_summary,
                 "link_pdf": link_pdf,
+            })
+
+        # only the excerpt is kept unless the full text is saved; cleaning can shrink the raw
+        # text a bit, so extraction stops with some headroom past _TEXT_CHARS
+        max_chars = None if _SAVE_FULL_TEXT else 2 * _TEXT_CHARS
+
+        # papers already extracted by an earlier query need no network or parsing
+        text_by_index = {}
+        if _EXTRACT_TEXT:
+            for idx, item in enumerate(out):
+                if item["url"]:
+                    cached_text = pdf_text_cache.get(arxiv_id_from_url(item["url"]), _MAX_PAGES, max_chars)
+                    if cached_text is not None:
+                        text_by_index[idx] = cached_text
+
+        # PDF downloads are network-bound, so overlap them; the PDF rate limiter keeps them polite
+        pdf_bytes_by_index = {}
+        if _INCLUDE_PDF or _EXTRACT_TEXT:
+            with ThreadPoolExecutor(max_workers=_MAX_FETCH_WORKERS) as ex:
+                futures = {
+                    ex.submit(_fetch_pdf_rate_limited, item["link_pdf"], _MAX_PDF_BYTES): idx
+                    for idx, item in enumerate(out)
+                    if item["link_pdf"] and idx not in text_by_index
+                }
+                for future in as_completed(futures):
+                    idx = futures[future]
+                    try:
+                        pdf_bytes_by_index[idx] = future.result()
+                    except Exception as e:
+                        out[idx]["pdf_error"] = f"PDF fetch failed: {e}"
+
+        # PDF parsing is CPU-bound, so it goes to worker processes rather than threads
+        if _EXTRACT_TEXT and len(pdf_bytes_by_index) == 1:
+            # not worth the inter-process round trip for a single PDF
+            for idx, pdf_bytes in pdf_bytes_by_index.items():
+                try:
+                    text_by_index[idx] = extract_pdf_text(pdf_bytes, _MAX_PAGES, max_chars)
+                except Exception as e:
+                    out[idx]["text_error"] = f"Text extraction failed: {e}"
+        elif _EXTRACT_TEXT and pdf_bytes_by_index:
+            pool = _get_process_pool()
+            futures = {
+                pool.submit(extract_pdf_text, pdf_bytes, _MAX_PAGES, max_chars): idx
+                for idx, pdf_bytes in pdf_bytes_by_index.items()
             }
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    text_by_index[idx] = future.result()
+                except Exception as e:
+                    out[idx]["text_error"] = f"Text extraction failed: {e}"
 
-            pdf_bytes = None
-            if (_INCLUDE_PDF or _EXTRACT_TEXT) and link_pdf:
+        # a truncated PDF that couldn't be parsed is downloaded again in full
+        if _EXTRACT_TEXT and _MAX_PDF_BYTES:
+            for idx, pdf_bytes in pdf_bytes_by_index.items():
+                if len(pdf_bytes) < _MAX_PDF_BYTES or text_by_index.get(idx):
+                    continue
                 try:
-                    pdf_bytes = fetch_pdf_bytes(session, link_pdf, timeout=90)
-                    time.sleep(_SLEEP_SECONDS)
+                    full_bytes = _fetch_pdf_rate_limited(out[idx]["link_pdf"])
+                    text_by_index[idx] = extract_pdf_text(full_bytes, _MAX_PAGES, max_chars)
+                    out[idx].pop("text_error", None)
                 except Exception as e:
-                    item["pdf_error"] = f"PDF fetch failed: {e}"
+                    out[idx]["text_error"] = f"Text extraction failed: {e}"
+
+        for idx in pdf_bytes_by_index:
+            if text_by_index.get(idx) and out[idx]["url"]:
+                pdf_text_cache.set(
+                    arxiv_id_from_url(out[idx]["url"]), _MAX_PAGES, text_by_index[idx], max_chars
+                )
 
-            if _EXTRACT_TEXT and pdf_bytes:
+        for idx, item in enumerate(out):
+            abstract_summary = item["summary"]
+
+            if idx in text_by_index:
                 try:
-                    text = pdf_bytes_to_text(pdf_bytes, max_pages=_MAX_PAGES)
-                    text = clean_text(text) if text else ""
+                    text = text_by_index[idx]
                     if text:
                         if _SAVE_FULL_TEXT:
                             item["pdf_text"] = text
                         else:
                             snippet = text[:_TEXT_CHARS].strip()
-                            letters = sum(ch.isalpha() for ch in snippet)
-                            spaces = snippet.count(" ")
-                            longest_token = max(
-                                (len(tok) for tok in snippet.split()), default=0
-                            )
                             # Some PDFs extract as unreadable concatenated tokens; keep excerpt useful.
-                            looks_unreadable = (
-                                letters > 120
-                                and (spaces / max(1, letters)) < 0.03
-                                and longest_token > 80
-                            )
-                            if looks_unreadable:
+                            if looks_unreadable(snippet):
                                 item["pdf_text_excerpt"] = abstract_summary
                                 item["pdf_text_warning"] = (
                                     "Extracted PDF text looked unreadable; using abstract."
@@ -119,9 +209,8 @@ def arxiv_search_tool(
                 except Exception as e:
                     item["text_error"] = f"Text extraction failed: {e}"
 
-            out.append(item)
         return out
-    except ET.ParseError as e:
+    except XMLParseError as e:
         return [{"error": f"arXiv API XML parse failed: {e}"}]
     except Exception as e:
         return [{"error": f"Unexpected error: {e}"}]
@@ -129,6 +218,16 @@ def arxiv_search_tool(
 
 
 # ----- Tavily search -----
+@functools.lru_cache(maxsize=1)
+def _get_tavily_client() -> TavilyClient:
+    # one client (and its connection pool) for all searches; env is read on first use
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("TAVILY_API_KEY not found in environment variables.")
+
+    return TavilyClient(api_key, base_url=os.getenv("DLAI_TAVILY_BASE_URL"))
+
+
 def tavily_search_tool(
     query: str, max_results: int = 5, include_images: bool = False
 ) -> list[dict]:
@@ -143,11 +242,7 @@ def tavily_search_tool(
     Returns:
         List[dict]: A list of dictionaries with keys like 'title', 'content', and 'url'.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY not found in environment variables.")
-
-    client = TavilyClient(api_key, base_url=os.getenv("DLAI_TAVILY_BASE_URL"))
+    client = _get_tavily_client()
 
     try:
         response = client.search(
@@ -176,6 +271,9 @@ def tavily_search_tool(
 
 
 # ------ Wikipedia search tool --------
+_WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+
 def wikipedia_search_tool(query: str, sentences: int = 5) -> List[Dict]:
     """
     Searches Wikipedia for a summary of the given query.
@@ -187,12 +285,29 @@ def wikipedia_search_tool(query: str, sentences: int = 5) -> List[Dict]:
     Returns:
         List[Dict]: A list with a single dictionary containing title, summary, and URL.
     """
+    # search, page lookup and intro extract in a single MediaWiki API round trip
+    params = {
+        "action": "query",
+        "format": "json",
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": 1,
+        "prop": "extracts|info",
+        "exintro": 1,
+        "explaintext": 1,
+        "exsentences": sentences,
+        "inprop": "url",
+        "redirects": 1,
+    }
     try:
-        page_title = wikipedia.search(query)[0]
-        page = wikipedia.page(page_title)
-        summary = wikipedia.summary(page_title, sentences=sentences)
+        resp = session.get(_WIKIPEDIA_API_URL, params=params, timeout=30)
+        resp.raise_for_status()
+        pages = resp.json().get("query", {}).get("pages", {})
+        if not pages:
+            return [{"error": f"No Wikipedia results for '{query}'."}]
+        page = next(iter(pages.values()))
 
-        return [{"title": page.title, "summary": summary, "url": page.url}]
+        return [{"title": page["title"], "summary": page.get("extract", ""), "url": page["fullurl"]}]
     except Exception as e:
         return [{"error": str(e)}]
 
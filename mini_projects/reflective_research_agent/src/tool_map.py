@@ -1,4 +1,8 @@
-from research_tools import arxiv_search_tool, tavily_search_tool, wikipedia_search_tool
+import json
+import asyncio
+from types import MappingProxyType
+
+from .research_tools import arxiv_search_tool, tavily_search_tool, wikipedia_search_tool
 
 
 # ---- Tool def ----
@@ -73,9 +77,40 @@ wikipedia_tool_def = {
 }
 
 
-# Tool mapping
-tool_mapping = {
+# All tool defs, sent with every research agent turn
+tool_defs = (arxiv_tool_def, tavily_tool_def, wikipedia_tool_def)
+
+
+# Tool mapping (read-only, shared by every dispatch)
+tool_mapping = MappingProxyType({
     "tavily_search_tool": tavily_search_tool,
     "arxiv_search_tool": arxiv_search_tool,
     "wikipedia_search_tool": wikipedia_search_tool,
-}
+})
+
+
+async def run_tool_calls(tool_calls) -> list[dict]:
+    """
+    Runs the tool calls requested in one assistant turn concurrently and returns the tool messages.
+    The tools are blocking (requests / Tavily SDK), so each one runs in a worker thread.
+    """
+
+    async def run(tool_call) -> dict:
+        # an unknown tool name or malformed arguments become an error result for the model,
+        # rather than failing the other calls of the turn
+        try:
+            func = tool_mapping.get(tool_call.function.name)
+            if func is None:
+                raise ValueError(f"Unknown tool: {tool_call.function.name}")
+            args = json.loads(tool_call.function.arguments or "{}")
+            result = await asyncio.to_thread(func, **args)
+        except Exception as e:
+            result = [{"error": str(e)}]
+        return {"role": "tool", "tool_call_id": tool_call.id, "content": json.dumps(result)}
+
+    return await asyncio.gather(*[run(tool_call) for tool_call in tool_calls])
+
+
+def run_tool_calls_sync(tool_calls) -> list[dict]:
+    """Blocking wrapper around run_tool_calls for callers without an event loop."""
+    return asyncio.run(run_tool_calls(tool_calls))
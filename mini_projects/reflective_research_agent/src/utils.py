@@ -1,6 +1,6 @@
-import os, re
+import os, re, time, string, sqlite3, threading
 import requests
-from io import BytesIO
+from io import BytesIO, StringIO
 from typing import List, Dict, Optional
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -34,15 +34,110 @@ def build_session(
     return s
 
 
+class RateLimiter:
+    """
+    Thread-safe token bucket refilling one token every `min_interval` seconds, up to `capacity`.
+    Each caller reserves a token under the lock and only sleeps for its own slot, so concurrent
+    callers queue up behind each other instead of each sleeping a fixed amount.
+    """
+
+    def __init__(self, min_interval: float, capacity: int = 1):
+        self.min_interval = min_interval
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated_at
+            self._tokens = min(self.capacity, self._tokens + elapsed / self.min_interval)
+            self._updated_at = now
+            # a negative balance is a reservation for a future slot
+            self._tokens -= 1
+            delay = -self._tokens * self.min_interval if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PdfTextCache:
+    """
+    Persistent cache of cleaned PDF text keyed by (arXiv id, max_pages, max_chars), stored in sqlite.
+    Papers seen by an earlier query skip both the download and the extraction.
+    """
+
+    def __init__(self, path: str, expire_seconds: float = 30 * 86400):
+        self.path = path
+        self.expire_seconds = expire_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdf_text ("
+                "arxiv_id TEXT, max_pages INTEGER, max_chars INTEGER, text TEXT, created_at REAL, "
+                "PRIMARY KEY (arxiv_id, max_pages, max_chars))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per call keeps the cache usable from worker threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, arxiv_id: str, max_pages: Optional[int], max_chars: Optional[int] = None) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM pdf_text "
+                "WHERE arxiv_id = ? AND max_pages IS ? AND max_chars IS ? AND created_at > ?",
+                (arxiv_id, max_pages, max_chars, time.time() - self.expire_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, arxiv_id: str, max_pages: Optional[int], text: str, max_chars: Optional[int] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_text VALUES (?, ?, ?, ?, ?)",
+                (arxiv_id, max_pages, max_chars, text, time.time()),
+            )
+
+
 # ----- Tool Utilities -----
+_HYPHEN_BREAK_RE = re.compile(r"-\n")
+_CARRIAGE_RETURN_RE = re.compile(r"\r\n|\r")
+_SPACES_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
 def clean_text(s: str) -> str:
-    s = re.sub(r"-\n", "", s)  # "transfor-\nmers" -> "transformers"
-    s = re.sub(r"\r\n|\r", "\n", s)  # normaliza saltos
-    s = re.sub(r"[ \t]+", " ", s)  # colapsa espacios
-    s = re.sub(r"\n{3,}", "\n\n", s)  # no más de 1 línea en blanco seguida
+    # substring checks are much cheaper than a regex scan, skip passes that can't match
+    if "-\n" in s:
+        s = _HYPHEN_BREAK_RE.sub("", s)  # "transfor-\nmers" -> "transformers"
+    if "\r" in s:
+        s = _CARRIAGE_RETURN_RE.sub("\n", s)  # normaliza saltos
+    s = _SPACES_RE.sub(" ", s)  # colapsa espacios
+    if "\n\n\n" in s:
+        s = _BLANK_LINES_RE.sub("\n\n", s)  # no más de 1 línea en blanco seguida
     return s.strip()
 
 
+# every byte except ASCII letters, deleted with bytes.translate to count letters in C
+_NON_LETTER_BYTES = bytes(b for b in range(256) if chr(b) not in string.ascii_letters)
+
+
+def looks_unreadable(snippet: str) -> bool:
+    """Some PDFs extract as unreadable concatenated tokens (few spaces, very long words)."""
+    data = snippet.encode("ascii", "ignore")
+    spaces = data.count(b" ")
+    # letters <= len(data), so normal prose already fails the space-ratio check here
+    if len(data) <= 120 or spaces >= 0.03 * len(data):
+        return False
+
+    letters = len(data.translate(None, _NON_LETTER_BYTES))
+    longest_token = max(map(len, data.split()), default=0)
+    return (
+        letters > 120
+        and (spaces / max(1, letters)) < 0.03
+        and longest_token > 80
+    )
+
+
 def _safe_filename(name: str) -> str:
     import re
 
@@ -62,24 +157,58 @@ def ensure_pdf_url(abs_or_pdf_url: str) -> str:
     return url
 
 
-def fetch_pdf_bytes(session: requests.Session, pdf_url: str, timeout: int = 90) -> bytes:
-    r = session.get(pdf_url, timeout=timeout, allow_redirects=True)
-    r.raise_for_status()
-    return r.content
-
-
-def pdf_bytes_to_text(pdf_bytes: bytes, max_pages: Optional[int] = None) -> str:
+def arxiv_id_from_url(url: str) -> str:
+    # "http://arxiv.org/abs/2101.00001v2" -> "2101.00001v2", "…/abs/cs/0101001v1" -> "cs/0101001v1"
+    url = url.strip()
+    for marker in ("/abs/", "/pdf/"):
+        if marker in url:
+            url = url.split(marker, 1)[1]
+            break
+    return url[:-4] if url.endswith(".pdf") else url
+
+
+def fetch_pdf_bytes(
+    session: requests.Session,
+    pdf_url: str,
+    timeout: int = 90,
+    max_bytes: Optional[int] = None,
+) -> bytes:
+    # with max_bytes only the head of the file is downloaded, enough for the first pages
+    headers = {"Range": f"bytes=0-{max_bytes - 1}"} if max_bytes else None
+    with session.get(
+        pdf_url, timeout=timeout, allow_redirects=True, stream=True, headers=headers
+    ) as r:
+        r.raise_for_status()
+        buf = BytesIO()
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            buf.write(chunk)
+            # the server may ignore Range, so cap on our side too
+            if max_bytes and buf.tell() >= max_bytes:
+                break
+    data = buf.getvalue()
+    return data[:max_bytes] if max_bytes else data
+
+
+def pdf_bytes_to_text(
+    pdf_bytes: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None
+) -> str:
     # 1) PyMuPDF
     try:
         import fitz  # PyMuPDF
 
-        out = []
+        buf = StringIO()
         with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
             n = len(doc)
             limit = n if max_pages is None else min(max_pages, n)
-            for i in range(limit):
-                out.append(doc.load_page(i).get_text("text"))
-        return "\n".join(out)
+            for i, page in enumerate(doc.pages(stop=limit)):
+                if i:
+                    buf.write("\n")
+                # plain reading-order text; clean_text doesn't need sorting by position
+                buf.write(page.get_text("text", sort=False))
+                # the remaining pages would only be cut off by the caller
+                if max_chars is not None and buf.tell() >= max_chars:
+                    break
+        return buf.getvalue()
     except Exception:
         pass
 
@@ -95,6 +224,14 @@ def pdf_bytes_to_text(pdf_bytes: bytes, max_pages: Optional[int] = None) -> str:
         raise RuntimeError(f"PDF text extraction failed: {e}")
 
 
+def extract_pdf_text(
+    pdf_bytes: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None
+) -> str:
+    """Extract and clean PDF text; module-level so it can run in a worker process."""
+    text = pdf_bytes_to_text(pdf_bytes, max_pages=max_pages, max_chars=max_chars)
+    return clean_text(text) if text else ""
+
+
 def maybe_save_pdf(pdf_bytes: bytes, dest_dir: str, filename: str) -> str:
     os.makedirs(dest_dir, exist_ok=True)
     path = os.path.join(dest_dir, _safe_filename(filename))
@@ -1,32 +1,192 @@
+from __future__ import annotations
+
 import os
+import re
+import copy
 import json
-from openai import OpenAI
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
-
+import uuid
+import asyncio
+import hashlib
+import importlib.util
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
+
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# records are only enqueued on the hot path; a background thread writes them to app.log
+log_queue = queue.Queue(-1)
+file_handler = logging.FileHandler("app.log", mode="a")
+file_handler.setFormatter(logging.Formatter(
+    fmt="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+))
+log_listener = QueueListener(log_queue, file_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    filename="app.log",
-    filemode="a",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+    handlers=[QueueHandler(log_queue)],
+    format="%(message)s",  # the file handler applies the full format
     force=True,
 )
 
 
 MODEL = "gpt-5-nano"
-
-
-class Tool(BaseModel):
-    name: str = Field("Name of the tool")
-    description: str = Field("A quick description of what the tool is, and what it does?")
-    input_schema: Dict[str, Any] = Field("The schema of the input that the tool requires to operate")
+# identical conversations are answered from memory; opt-in since model output isn't deterministic
+CACHE_ENABLED = os.getenv("AGENT_CACHE") == "1"
+RESPONSE_CACHE_SIZE = 128
+# paraphrased user turns (by embedding cosine similarity) reuse an earlier answer
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# past this many messages, everything but the most recent turns is folded into a summary
+COMPACT_THRESHOLD = 24
+KEEP_RECENT_MESSAGES = 8
+MAX_TOOL_RESULT_CHARS = 16384
+# unchanged files (same mtime and size) are served from memory on repeated reads
+READ_CACHE_SIZE = 64
+READ_CACHE_MAX_FILE_SIZE = 1024 * 1024
+
+# hard guard on prompt size, checked before every request
+MAX_PROMPT_TOKENS = 100_000
+
+COMPACT_PROMPT = "Summarize the conversation below between a user and a coding assistant with file tools. Keep the user's goals, decisions made, files read or edited and any facts still needed to continue. Be concise."
+
+
+# tiktoken is optional; without it, tokens are estimated at ~4 characters each
+_token_encoding = None
+_token_encoding_loaded = False
+
+
+def _get_token_encoding():
+    # loaded on the first count: get_encoding may download the BPE file, so any failure falls back
+    global _token_encoding, _token_encoding_loaded
+    if not _token_encoding_loaded:
+        _token_encoding_loaded = True
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logging.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+    return _token_encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    return count_tokens(message.get("content") or json.dumps(message.get("tool_calls")))
+
+
+# Tool schemas sent with every request; static, so they are built once at import
+TOOL_SCHEMAS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "read_file",
+            "description": "Read the content of file at the specified path",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The path of the file to read",
+                    },
+                },
+                "required": ["path"],
+            },
+            "strict": True,
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_files",
+            "description": "List all the files and directories in the specified path",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The path of the directory whose files to list (default is current directory with value '.')",
+                    },
+                },
+                "required": [],
+            },
+            "strict": True,
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "edit_file",
+            "description": "Edit the content of file at the specified path by replacing old_text with new_text. Creates the file if it doesn't exists",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The path of the file to edit",
+                    },
+                    "old_text": {
+                        "type": "string",
+                        "description": "The text to search for and replace (new file will be created if it's empty)",
+                    },
+                    "new_text": {
+                        "type": "string",
+                        "description": "The text to replace old_text with (ignored when edits is given)",
+                    },
+                    "edits": {
+                        "type": "array",
+                        "description": "Several replacements to apply to an existing file in one pass, instead of old_text/new_text",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "old_text": {"type": "string"},
+                                "new_text": {"type": "string"},
+                            },
+                            "required": ["old_text", "new_text"],
+                            "additionalProperties": False,
+                        },
+                    }
+                },
+                "required": ["path", "new_text"],
+            },
+            "strict": True,
+        }
+    },
+]
 
 
 class AIAgent:
     def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
+        # imported here so the module (and the CLI banner) loads without the SDK's import cost
+        import httpx
+        from openai import AsyncOpenAI
+
+        # one pooled connection set for every chat, embedding and summary call;
+        # HTTP/2 (when h2 is installed) multiplexes concurrent requests over a single connection
+        self._http = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        )
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self._http)
+        # stable per conversation, so the provider can route turns to where the prompt prefix is cached
+        self._session_id = uuid.uuid4().hex
+        # the history is append-only (apart from compaction), so every request extends the last prefix;
+        # the system prompt at index 0 never changes
         self.messages: List[Dict[str, Any]] = []
         self.messages.append(
             {
@@ -34,64 +194,17 @@ class AIAgent:
                 "content": "You are a helpful coding assistant operating in a terminal environment. Output only plain text without markdown formatting, as your responses appear directly in the terminal. Be concise but thorough, providing clear and practical advice with a friendly tone. Don't use any asterisk characters in your responses."
             }
         )
-        self.tools: List[Tool] = []
-        self._setup_tools()
+        self._resp_cache: OrderedDict[str, Any] = OrderedDict()
+        # tools run in worker threads, so the read cache is guarded by a lock
+        self._read_cache: OrderedDict[tuple, str] = OrderedDict()
+        self._read_cache_lock = threading.Lock()
+        # keys ([N, dim] L2-normalized embeddings) and values live in one dict that is only
+        # updated in place, so chat_batch copies sharing it always see matching rows
+        self._semantic_cache: Dict[str, Any] = {"keys": None, "values": []}
+        # id(message) -> (message, tokens); holding the message keeps its id from being reused
+        self._token_counts: Dict[int, tuple] = {}
         print("Agent initialized.")
-        print("Number of tools: ", len(self.tools))
-
-    def _setup_tools(self):
-        self.tools = [
-            Tool(
-                name="read_file",
-                description="Read the content of file at the specified path",
-                input_schema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "The path of the file to read",
-                        },
-                    },
-                    "required": ["path"],
-                }
-            ),
-            Tool(
-                name="list_files",
-                description="List all the files and directories in the specified path",
-                input_schema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "The path of the directory whose files to list (default is current directory with value '.')",
-                        },
-                    },
-                    "required": [],
-                }
-            ),
-            Tool(
-                name="edit_file",
-                description="Edit the content of file at the specified path by replacing old_text with new_text. Creates the file if it doesn't exists",
-                input_schema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "The path of the file to edit",
-                        },
-                        "old_text": {
-                            "type": "string",
-                            "description": "The text to search for and replace (new file will be created if it's empty)",
-                        },
-                        "new_text": {
-                            "type": "string",
-                            "description": "The text to replace old_text with",
-                        }
-                    },
-                    "required": ["new_text"],
-                }
-            )
-        ]
+        print("Number of tools: ", len(TOOL_SCHEMAS))
 
     def _execute_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> str:
 
@@ -101,6 +214,9 @@ class AIAgent:
                 return self._read_file(path=tool_input["path"])
             elif tool_name == "list_files":
                 return self._list_files(path=tool_input.get("path", "."))
+            elif tool_name == "edit_file" and tool_input.get("edits"):
+                # even a single edit goes here, so an empty old_text is rejected rather than overwriting the file
+                return self._edit_file_multi(path=tool_input["path"], edits=tool_input["edits"])
             elif tool_name == "edit_file":
                 return self._edit_file(
                     path=tool_input["path"],
@@ -114,10 +230,24 @@ class AIAgent:
 
     def _read_file(self, path: str) -> str:
         try:
+            # a stat decides whether the file changed since it was last read
+            st = os.stat(path)
+            key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+            with self._read_cache_lock:
+                if key in self._read_cache:
+                    self._read_cache.move_to_end(key)
+                    return self._read_cache[key]
+
             with open(path, "r") as f:
                 content = f.read()
 
-            return f"File content of {path}: \n{content}"
+            if st.st_size <= READ_CACHE_MAX_FILE_SIZE:
+                with self._read_cache_lock:
+                    self._read_cache[key] = content
+                    if len(self._read_cache) > READ_CACHE_SIZE:
+                        self._read_cache.popitem(last=False)
+
+            return content
         except FileNotFoundError:
             return f"File not found: {path}"
         except Exception as e:
@@ -125,37 +255,43 @@ class AIAgent:
 
     def _list_files(self, path: str) -> str:
         try:
-            if not (os.path.exists(path)) or not (os.path.isdir(path)):
-                return f"[Error] Directory does not exist or is not a directory: {path}"
+            # scandir entries carry the file type from readdir, so there's no stat per entry
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
 
             items = []
-            for item in sorted(os.listdir(path)):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    items.append(f"[DIR] {item}/")
-                    # items.extend(list_files(item_path))
+            for entry in entries:
+                if entry.is_dir():
+                    items.append(f"[DIR] {entry.name}/")
+                    # items.extend(list_files(entry.path))
                 else:
-                    items.append(f"[FILE] {item}")
+                    items.append(f"[FILE] {entry.name}")
             if len(items) == 0:
                 return f"Empty directory: {path}"
 
             return f"Content of {path}:\n{'\n'.join(items)}"
 
+        except (FileNotFoundError, NotADirectoryError):
+            return f"[Error] Directory does not exist or is not a directory: {path}"
         except Exception as e:
             return f"Error listing files: {str(e)}"
 
     def _edit_file(self, path: str, old_text: str, new_text: str) -> str:
         try:
             if os.path.exists(path) and old_text:
-                with open(path, "r") as f:
+                # edited as bytes, so the file is never decoded and re-encoded
+                with open(path, "rb") as f:
                     content = f.read()
+                old_bytes, new_bytes = self._encode_edit(content, old_text, new_text)
 
-                if old_text not in content:
+                # a single scan both finds and replaces every occurrence
+                parts = content.split(old_bytes)
+                if len(parts) == 1:
                     return f"Text not found in {path}: \n'{old_text}'"
 
-                content = content.replace(old_text, new_text)
+                content = new_bytes.join(parts)
 
-                with open(path, "w") as f:
+                with open(path, "wb") as f:
                     f.write(content)
 
                 return f"Text updated successfully: {path}"
@@ -173,7 +309,195 @@ class AIAgent:
         except Exception as e:
             return f"Error editing file: {str(e)}"
 
-    def chat(self, user_input: str) -> str:
+    @staticmethod
+    def _encode_edit(content: bytes, old_text: str, new_text: str) -> tuple:
+        """UTF-8 encodes an edit; binary mode doesn't translate newlines, so CRLF files get CRLF forms"""
+        old_bytes, new_bytes = old_text.encode("utf-8"), new_text.encode("utf-8")
+        if old_bytes not in content and b"\r\n" in content:
+            old_bytes, new_bytes = old_bytes.replace(b"\n", b"\r\n"), new_bytes.replace(b"\n", b"\r\n")
+        return old_bytes, new_bytes
+
+    def _edit_file_multi(self, path: str, edits: List[Dict[str, str]]) -> str:
+        try:
+            replacements = {}
+            for edit in edits:
+                old_text, new_text = edit["old_text"], edit["new_text"]
+                if not old_text:
+                    return "Every edit needs a non-empty old_text"
+                if replacements.get(old_text, new_text) != new_text:
+                    return f"Conflicting edits for the same text (no edits applied): \n'{old_text}'"
+                replacements[old_text] = new_text
+
+            # edited as bytes like single edits, so the file is never decoded and re-encoded
+            with open(path, "rb") as f:
+                content = f.read()
+
+            encoded = {}
+            missing = []
+            for old_text, new_text in replacements.items():
+                old_bytes, new_bytes = self._encode_edit(content, old_text, new_text)
+                if old_bytes not in content:
+                    missing.append(old_text)
+                encoded[old_bytes] = new_bytes
+            if missing:
+                return f"Text not found in {path} (no edits applied): \n" + "\n".join(f"'{old}'" for old in missing)
+
+            # one compiled alternation applies every edit in a single substitution pass;
+            # re still tries the alternatives at each position (O(n*k)), fine for a few edits per call.
+            # longest patterns first, so the longest match wins where they overlap
+            pattern = re.compile(b"|".join(re.escape(old) for old in sorted(encoded, key=len, reverse=True)))
+            content = pattern.sub(lambda match: encoded[match.group(0)], content)
+
+            with open(path, "wb") as f:
+                f.write(content)
+
+            return f"Text updated successfully ({len(replacements)} edits): {path}"
+
+        except FileNotFoundError:
+            return f"File not found: {path}"
+        except Exception as e:
+            return f"Error editing file: {str(e)}"
+
+    def _cache_key(self, tool_schemas: List[Dict[str, Any]]) -> str:
+        payload = json.dumps(
+            {"model": MODEL, "messages": self.messages, "tools": tool_schemas},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _embed(self, text: str) -> np.ndarray:
+        # numpy is only needed once the semantic cache is used (AGENT_CACHE=1)
+        import numpy as np
+        response = await self.client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _semantic_lookup(self, vector: np.ndarray) -> Optional[str]:
+        keys = self._semantic_cache["keys"]
+        if keys is None:
+            return None
+        scores = keys @ vector
+        best = int(scores.argmax())
+        return self._semantic_cache["values"][best] if scores[best] >= SEMANTIC_CACHE_THRESHOLD else None
+
+    def _semantic_store(self, vector: np.ndarray, content: str):
+        import numpy as np
+        keys = self._semantic_cache["keys"]
+        self._semantic_cache["keys"] = vector[None, :] if keys is None else np.vstack([keys, vector])
+        self._semantic_cache["values"].append(content)
+
+    @staticmethod
+    def _independent(calls: List[Any]) -> bool:
+        """True if no call in the turn depends on another one's side effects"""
+        names = [tool_call["function"]["name"] for tool_call, _ in calls]
+        if "edit_file" not in names:
+            return True
+        if "list_files" in names:
+            return False
+        paths = [os.path.normpath(args.get("path", ".")) for _, args in calls]
+        return len(paths) == len(set(paths))
+
+    async def _stream_completion(self, tool_schemas: List[Dict[str, Any]], message: Dict[str, Any]):
+        """
+        Streams one completion, yielding text deltas as they arrive.
+        Once the stream ends, `message` holds the reassembled assistant message (content + tool calls).
+        """
+        stream = await self.client.chat.completions.create(
+            model=MODEL,
+            messages=self.messages,
+            tools=tool_schemas,
+            stream=True,
+            user=self._session_id,
+        )
+
+        content_parts = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content_parts.append(delta.content)
+                yield delta.content
+
+            # tool call deltas arrive in fragments, keyed by the call's index
+            for tool_call in delta.tool_calls or []:
+                call = tool_calls.setdefault(
+                    tool_call.index,
+                    {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+                )
+                if tool_call.id:
+                    call["id"] = tool_call.id
+                if tool_call.function and tool_call.function.name:
+                    call["function"]["name"] += tool_call.function.name
+                if tool_call.function and tool_call.function.arguments:
+                    call["function"]["arguments"] += tool_call.function.arguments
+
+        message.update({"role": "assistant", "content": "".join(content_parts) or None})
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+
+    def _trim_to_budget(self):
+        """Drops the oldest turns (never the system messages or the current turn) until the prompt fits"""
+        # history messages aren't mutated once appended, so each is only encoded once; the
+        # cache is rebuilt from the live history, so dropped messages don't stay pinned
+        token_counts = {}
+        for m in self.messages:
+            cached = self._token_counts.get(id(m))
+            token_counts[id(m)] = cached if cached and cached[0] is m else (m, message_tokens(m))
+        self._token_counts = token_counts
+        total = sum(tokens for _, tokens in token_counts.values())
+        while total > MAX_PROMPT_TOKENS:
+            start = next(i for i, m in enumerate(self.messages) if m["role"] != "system")
+            # whole turns are dropped, so tool results never lose the call that produced them
+            end = next((i for i in range(start + 1, len(self.messages)) if self.messages[i]["role"] == "user"), None)
+            if end is None:
+                break
+            for m in self.messages[start:end]:
+                total -= token_counts.pop(id(m))[1]
+            logging.info(f"Dropped {end - start} old messages to stay under {MAX_PROMPT_TOKENS} tokens")
+            del self.messages[start:end]
+
+    async def _compact_history(self):
+        """Replaces older turns with a single summary message so each request stays bounded"""
+        if len(self.messages) <= COMPACT_THRESHOLD:
+            return
+
+        # cut at a user message so no tool result is separated from the call that produced it
+        cut = max(
+            (i for i, m in enumerate(self.messages) if m["role"] == "user" and i <= len(self.messages) - KEEP_RECENT_MESSAGES),
+            default=0,
+        )
+        if cut <= 1:
+            return
+
+        transcript = "\n".join(
+            f"{m['role']}: {(m.get('content') or json.dumps(m.get('tool_calls')))[:2000]}"
+            for m in self.messages[1:cut]
+        )
+        try:
+            completion = await self.client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": COMPACT_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+            )
+        except Exception as e:
+            logging.warning(f"History compaction failed: {e}")
+            return
+
+        summary = completion.choices[0].message.content
+        logging.info(f"Compacted {cut - 1} messages into a summary")
+        self.messages = [
+            self.messages[0],
+            {"role": "system", "content": f"Prior conversation summary: {summary}"},
+            *self.messages[cut:],
+        ]
+
+    async def chat_stream(self, user_input: str):
+        """Yields the assistant's reply in chunks as it is generated"""
         logging.info(f"User input: {user_input}")
 
         self.messages.append(
@@ -183,57 +507,110 @@ class AIAgent:
             }
         )
 
-        tool_schemas = [
-            {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.input_schema,
-                    "strict": True,
-                }
-            }
-            for tool in self.tools
-        ]
+        user_vector = None
+        if CACHE_ENABLED:
+            try:
+                user_vector = await self._embed(user_input)
+                cached_content = self._semantic_lookup(user_vector)
+                if cached_content is not None:
+                    logging.info("Semantic cache hit")
+                    self.messages.append({"role": "assistant", "content": cached_content})
+                    yield cached_content
+                    return
+            except Exception as e:
+                logging.warning(f"Semantic cache lookup failed: {e}")
+
+        tool_schemas = TOOL_SCHEMAS
 
+        # answers that needed tools reflect the file system at the time, so they aren't reused
+        used_tools = False
         while True:
             try:
-                completion = self.client.chat.completions.create(
-                    model=MODEL,
-                    messages=self.messages,
-                    tools=tool_schemas
-                )
-
-                response = completion.choices[0].message
+                self._trim_to_budget()
+
+                cache_key = None
+                if CACHE_ENABLED:
+                    cache_key = self._cache_key(tool_schemas)
+                    cached = self._resp_cache.get(cache_key)
+                    if cached is not None:
+                        logging.info("Response cache hit")
+                        self._resp_cache.move_to_end(cache_key)
+                        self.messages.append(cached)
+                        yield cached["content"]
+                        return
+
+                response = {}
+                async for piece in self._stream_completion(tool_schemas, response):
+                    yield piece
                 self.messages.append(response)
 
-                # assistant_messages = {
-                #     "role": "assistant",
-                #     "content": [],
-                # }
-                logging.info(f"LLM Response: \n{response}")
-                if not response.tool_calls:
-                    return response.content
-
-                for tool_call in response.tool_calls:
-                    name = tool_call.function.name
-                    args = json.loads(tool_call.function.arguments)
-                    tool_call_id = tool_call.id
+                if logging.getLogger().isEnabledFor(logging.INFO):
+                    logging.info(f"LLM Response: \n{response}")
+                if not response.get("tool_calls"):
+                    # only final answers are cached; tool results depend on the file system
+                    if cache_key is not None:
+                        self._resp_cache[cache_key] = response
+                        if len(self._resp_cache) > RESPONSE_CACHE_SIZE:
+                            self._resp_cache.popitem(last=False)
+                    if user_vector is not None and not used_tools and response["content"]:
+                        self._semantic_store(user_vector, response["content"])
+                    await self._compact_history()
+                    return
+
+                used_tools = True
+
+                calls = [(tool_call, json.loads(tool_call["function"]["arguments"])) for tool_call in response["tool_calls"]]
+                # tools do blocking file I/O, so they run in worker threads off the event loop
+                if len(calls) > 1 and self._independent(calls):
+                    # file reads and listings are I/O-bound, so independent calls overlap
+                    results = await asyncio.gather(*[
+                        asyncio.to_thread(self._execute_tool, tool_call["function"]["name"], args)
+                        for tool_call, args in calls
+                    ])
+                else:
+                    results = [
+                        await asyncio.to_thread(self._execute_tool, tool_call["function"]["name"], args)
+                        for tool_call, args in calls
+                    ]
 
-                    result = self._execute_tool(tool_name=name, tool_input=args)
+                # results are appended in call order, whichever finished first
+                for (tool_call, _), result in zip(calls, results):
                     logging.info(f"Tool Result: \n{result[:500]}\n...")
 
+                    # tool results stay in the history and are resent every turn, so big ones are cut
+                    if len(result) > MAX_TOOL_RESULT_CHARS:
+                        result = result[:MAX_TOOL_RESULT_CHARS] + f"\n...[truncated {len(result) - MAX_TOOL_RESULT_CHARS} characters]"
+
                     # Feed tool result back to the LLM
                     self.messages.append({
                         "role": "tool",
-                        "tool_call_id": tool_call_id,
-                        "content": json.dumps(result)
+                        "tool_call_id": tool_call["id"],
+                        "content": result  # already a string, no JSON wrapping needed
                     })
             except Exception as e:
-                return f"[Error]: {str(e)}"
+                yield f"[Error]: {str(e)}"
+                return
 
+    async def aclose(self):
+        await self.client.close()
 
-if __name__ == "__main__":
+    async def chat(self, user_input: str) -> str:
+        return "".join([piece async for piece in self.chat_stream(user_input) if piece])
+
+    async def _one_shot(self, user_input: str) -> str:
+        # shallow copy shares the client and the caches (all mutated in place, never rebound)
+        # but starts from the system prompt only
+        agent = copy.copy(self)
+        agent.messages = [self.messages[0]]
+        agent._session_id = uuid.uuid4().hex
+        return await agent.chat(user_input)
+
+    async def chat_batch(self, inputs: List[str]) -> List[str]:
+        """Answers independent questions concurrently, each in its own conversation; self.messages is untouched"""
+        return await asyncio.gather(*[self._one_shot(user_input) for user_input in inputs])
+
+
+async def main():
     agent = AIAgent(os.getenv("OPENAI_API_KEY"))
 
     print("AI Code Assistant")
@@ -254,8 +631,9 @@ if __name__ == "__main__":
                 continue
 
             print("\nAssistant: ", end="", flush=True)
-            response = agent.chat(user_input)
-            print(response)
+            async for piece in agent.chat_stream(user_input):
+                print(piece, end="", flush=True)
+            print()
             print()
 
         except KeyboardInterrupt:
@@ -265,3 +643,8 @@ if __name__ == "__main__":
             print(f"\nError: {str(e)}")
             print()
 
+    await agent.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())